@@ -1,6 +1,7 @@
 import tkinter as tk
 import traceback
 import threading
+import multiprocessing
 from tkinter import filedialog, messagebox, END
 from pathlib import Path
 
@@ -9,9 +10,156 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 
 from src.main import run_validation # Mantenemos tu lógica de validación intacta
+from src.results_view import ResultsModel, COLUMNS, ORDERS, ORDER_NATURAL
+from src.compare import STATUS_OK, STATUS_DIFF, STATUS_MISSING
 
 # --- Clases y Funciones ---
 
+class ResultsBrowser(ttk.Toplevel):
+    """
+    Tabla de resultados por factura. El Treeview tiene solo las filas visibles:
+    la barra de desplazamiento mueve un desplazamiento sobre la vista filtrada
+    y se reescriben los valores de esos ítems, así 100k+ facturas no crean 100k widgets.
+    """
+    ALL = "Todos"
+
+    def __init__(self, master, model: ResultsModel, resumen: str):
+        super().__init__(master=master)
+        self.title("Resultados de la validación")
+        self.geometry("900x560")
+        self.model = model
+        self.view = model.all_rows
+        self.offset = 0
+        self.page = 1
+
+        self.estado_var = tk.StringVar(value=self.ALL)
+        self.letra_var = tk.StringVar(value=self.ALL)
+        self.cuit_var = tk.StringVar()
+        self.order_var = tk.StringVar(value=ORDER_NATURAL)
+        self.count_text = tk.StringVar()
+
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=BOTH, expand=True)
+        ttk.Label(frame, text=resumen, justify=LEFT).pack(fill=X, pady=(0, 10))
+
+        # --- Filtros ---
+        filters = ttk.Frame(frame)
+        filters.pack(fill=X, pady=(0, 5))
+        ttk.Label(filters, text="Estado:").pack(side=LEFT)
+        estado_cb = ttk.Combobox(filters, textvariable=self.estado_var, state="readonly", width=12,
+                                 values=[self.ALL, STATUS_OK, STATUS_DIFF, STATUS_MISSING])
+        estado_cb.pack(side=LEFT, padx=(5, 15))
+        ttk.Label(filters, text="CUIT:").pack(side=LEFT)
+        ttk.Entry(filters, textvariable=self.cuit_var, width=16).pack(side=LEFT, padx=(5, 15))
+        ttk.Label(filters, text="Letra:").pack(side=LEFT)
+        letra_cb = ttk.Combobox(filters, textvariable=self.letra_var, state="readonly", width=5,
+                                values=[self.ALL] + model.letras)
+        letra_cb.pack(side=LEFT, padx=(5, 15))
+        ttk.Label(filters, text="Orden:").pack(side=LEFT)
+        order_cb = ttk.Combobox(filters, textvariable=self.order_var, state="readonly", width=24, values=list(ORDERS))
+        order_cb.pack(side=LEFT, padx=5)
+        for cb in (estado_cb, letra_cb, order_cb):
+            cb.bind("<<ComboboxSelected>>", lambda e: self._apply_filters())
+        self._cuit_job = None
+        self.cuit_var.trace_add("write", lambda *a: self._schedule_filters())
+
+        # --- Tabla virtual ---
+        table = ttk.Frame(frame)
+        table.pack(fill=BOTH, expand=True)
+        self.tree = ttk.Treeview(table, columns=COLUMNS, show="headings", selectmode="browse")
+        for col in COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=110, anchor=E if col.startswith(("Total", "Dif")) else W)
+        self.tree.tag_configure(STATUS_OK, foreground="#2E7D32")
+        self.tree.tag_configure(STATUS_DIFF, foreground="#C62828")
+        self.tree.tag_configure(STATUS_MISSING, foreground="#F9A825")
+        self.scroll = ttk.Scrollbar(table, orient=VERTICAL, command=self._on_scrollbar)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+        self.scroll.pack(side=RIGHT, fill=Y)
+
+        self.tree.bind("<Configure>", lambda e: self._resize())
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll_by(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(1, "units"))
+        self.tree.bind("<Prior>", lambda e: self._scroll_by(-1, "pages"))
+        self.tree.bind("<Next>", lambda e: self._scroll_by(1, "pages"))
+        self.tree.bind("<Double-1>", self._show_detail)
+
+        ttk.Label(frame, textvariable=self.count_text).pack(fill=X, pady=(5, 0))
+        self._apply_filters()
+
+    # --- Filtros y desplazamiento ---
+    def _schedule_filters(self):
+        # El CUIT se filtra al dejar de tipear un momento, no en cada tecla
+        if self._cuit_job is not None:
+            self.after_cancel(self._cuit_job)
+        self._cuit_job = self.after(250, self._apply_filters)
+
+    def _apply_filters(self):
+        self._cuit_job = None
+        estado = self.estado_var.get()
+        letra = self.letra_var.get()
+        self.view = self.model.view(
+            estado=None if estado == self.ALL else estado,
+            cuit=self.cuit_var.get(),
+            letra=None if letra == self.ALL else letra,
+            order=self.order_var.get(),
+        )
+        self.offset = 0
+        self.count_text.set(f"{len(self.view):,} de {len(self.model):,} facturas".replace(",", "."))
+        self._render()
+
+    def _resize(self):
+        # Filas que entran en el alto actual (descontando el encabezado)
+        style = ttk.Style()
+        row_h = int(style.lookup("Treeview", "rowheight") or 20)
+        page = max(1, (self.tree.winfo_height() - row_h) // row_h)
+        if page != self.page:
+            self.page = page
+            self._render()
+
+    def _scroll_by(self, n, what):
+        step = self.page if what == "pages" else 1
+        self._move_to(self.offset + int(n) * step)
+        return "break"
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._move_to(int(float(args[0]) * len(self.view)))
+        elif action == "scroll":
+            self._scroll_by(args[0], args[1])
+
+    def _move_to(self, offset):
+        offset = max(0, min(offset, len(self.view) - self.page))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+
+    def _render(self):
+        """Reescribe solo los ítems visibles con las filas [offset, offset + page) de la vista."""
+        positions = self.view[self.offset:self.offset + self.page]
+        items = self.tree.get_children()
+        for iid in items[len(positions):]:
+            self.tree.delete(iid)
+        for k, i in enumerate(positions):
+            values = self.model.row(i)
+            if k < len(items):
+                self.tree.item(items[k], values=values, tags=(values[3],))
+            else:
+                self.tree.insert("", END, values=values, tags=(values[3],))
+        n = max(len(self.view), 1)
+        self.scroll.set(self.offset / n, min(1.0, (self.offset + self.page) / n))
+
+    def _show_detail(self, event):
+        iid = self.tree.identify_row(event.y)
+        if not iid:
+            return
+        k = self.tree.index(iid)
+        if self.offset + k < len(self.view):
+            i = self.view[self.offset + k]
+            messagebox.showinfo("Detalle", self.model.message(i) or " - ".join(self.model.row(i)), parent=self)
+
+
 class App(ttk.Window):
     def __init__(self, title, size):
         # --- Configuración de la ventana principal ---
@@ -23,6 +171,8 @@ class App(ttk.Window):
         # --- Variables de estado ---
         self.origen_path = tk.StringVar()
         self.destino_path = tk.StringVar()
+        self.origen_paths = []
+        self.destino_paths = []
         self.origen_name = tk.StringVar()
         self.destino_name = tk.StringVar()
         self.output_dir = tk.StringVar(value=str(Path.cwd() / "outputs"))
@@ -66,10 +216,10 @@ class App(ttk.Window):
         options_frame.columnconfigure((0, 1), weight=1)
 
         # Hojas de Excel
-        ttk.Label(options_frame, text="Nombre de la hoja (Origen):").grid(row=0, column=0, sticky="w", padx=5, pady=(0, 5))
+        ttk.Label(options_frame, text="Hoja(s) de Origen (coma; * = todas):").grid(row=0, column=0, sticky="w", padx=5, pady=(0, 5))
         ttk.Entry(options_frame, textvariable=self.origen_sheet).grid(row=1, column=0, sticky="we", padx=5)
 
-        ttk.Label(options_frame, text="Nombre de la hoja (Destino):").grid(row=0, column=1, sticky="w", padx=5, pady=(0, 5))
+        ttk.Label(options_frame, text="Hoja(s) de Destino (coma; * = todas):").grid(row=0, column=1, sticky="w", padx=5, pady=(0, 5))
         ttk.Entry(options_frame, textvariable=self.destino_sheet).grid(row=1, column=1, sticky="we", padx=5)
 
         # Carpeta de Salida
@@ -95,26 +245,38 @@ class App(ttk.Window):
 
 
     def _pick_file(self, kind):
-        file_path = filedialog.askopenfilename(
+        # Se pueden elegir varios archivos (p. ej. un AFIP por mes o por punto de venta)
+        file_paths = filedialog.askopenfilenames(
             title="Elegir Excel de Origen (AFIP)" if kind == 'origen' else "Elegir Excel de Destino (Tango)",
             filetypes=[("Archivos de Excel", "*.xlsx"), ("Todos los archivos", "*.*")]
         )
-        if file_path:
-            p = Path(file_path)
+        if file_paths:
+            paths = [Path(f) for f in file_paths]
+            shown = paths[0].name if len(paths) == 1 else f"{len(paths)} archivos: " + ", ".join(p.name for p in paths)
             if kind == 'origen':
-                self.origen_path.set(str(p))   # ← path completo para lógica
-                self.origen_name.set(p.name)   # ← sólo nombre para mostrar
+                self.origen_paths = [str(p) for p in paths]   # ← paths completos para lógica
+                self.origen_path.set(self.origen_paths[0])
+                self.origen_name.set(shown)                   # ← sólo nombres para mostrar
             else:
-                self.destino_path.set(str(p))
-                self.destino_name.set(p.name)
-            self.status_text.set(f"Archivo seleccionado: {p.name}")
+                self.destino_paths = [str(p) for p in paths]
+                self.destino_path.set(self.destino_paths[0])
+                self.destino_name.set(shown)
+            self.status_text.set(f"Archivo(s) seleccionado(s): {shown}")
+
+    @staticmethod
+    def _sheets(value):
+        """'Hoja1, Hoja2' -> ['Hoja1', 'Hoja2']; vacío -> None (la de config.yaml). '*' = todas las hojas."""
+        names = [s.strip() for s in value.split(",") if s.strip()]
+        if not names:
+            return None
+        return names[0] if len(names) == 1 else names
 
     def _pick_output_dir(self):
         """Manejador para seleccionar la carpeta de salida."""
         dir_path = filedialog.askdirectory(title="Elegir carpeta de salida")
         if dir_path:
             self.output_dir.set(dir_path)
-            self.status_text.set(f"Carpeta de salida actualizada.")
+            self.status_text.set("Carpeta de salida actualizada.")
 
     def start_validation_thread(self):
         """Inicia la validación en un hilo separado para no bloquear la GUI."""
@@ -137,10 +299,10 @@ class App(ttk.Window):
         try:
             Path(self.output_dir.get()).mkdir(parents=True, exist_ok=True)
             result = run_validation(
-                origen_path=self.origen_path.get(),
-                destino_path=self.destino_path.get(),
-                origen_sheet=self.origen_sheet.get().strip() or None,
-                destino_sheet=self.destino_sheet.get().strip() or None,
+                origen_path=self.origen_paths,
+                destino_path=self.destino_paths,
+                origen_sheet=self._sheets(self.origen_sheet.get()),
+                destino_sheet=self._sheets(self.destino_sheet.get()),
                 output_dir=self.output_dir.get(),
             )
             # Programar la actualización de la GUI en el hilo principal
@@ -153,12 +315,14 @@ class App(ttk.Window):
         """Se ejecuta en el hilo principal cuando la validación es exitosa."""
         self._reset_ui_state()
         resumen = (
-            f"✔ Destino validado: {result['destino_validado']}\n"
-            f"✔ Origen validado: {result['origen_validado']}\n"
+            "".join(f"✔ Destino validado: {p}\n" for p in result['destinos_validados'])
+            + "".join(f"✔ Origen validado: {p}\n" for p in result['origenes_validados'])
             + (f"⚠ Sin coincidencia (AFIP→Tango): {result['faltantes']}\n" if result['faltantes'] else "✔ Todas las facturas existen en Tango.\n")
         )
         self.status_text.set("¡Validación completada con éxito!")
-        messagebox.showinfo("Proceso Terminado", resumen)
+        # En lugar de un messagebox con el resumen, abrimos el visor con todas las facturas
+        model = ResultsModel(result["comparacion"], result["mensajes"])
+        ResultsBrowser(self, model, resumen)
 
     def _on_validation_error(self, error):
         """Se ejecuta en el hilo principal si ocurre un error."""
@@ -172,6 +336,8 @@ class App(ttk.Window):
         self.validate_button.config(state="normal", text="🚀 Validar Facturas")
 
 def main():
+    # Necesario para los procesos de guardado en el .exe empaquetado
+    multiprocessing.freeze_support()
     app = App(title="Validador de Facturas v2.0", size="600x500")
     app.mainloop()
 
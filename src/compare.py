@@ -2,6 +2,14 @@ import numpy as np
 import pandas as pd
 from typing import Dict, List
 
+from src.money import amounts_match
+
+AMOUNT_COLS = ("IMP_EXENTO", "IMP_NETO", "IMP_IVA", "IMP_TOTAL")
+
+STATUS_OK      = "Coincide"
+STATUS_DIFF    = "No coincide"
+STATUS_MISSING = "Omitida"
+
 def _to_number_locale(x):
     if pd.isna(x) or x == "":
         return np.nan
@@ -13,17 +21,87 @@ def _to_number_locale(x):
     except Exception:
         return np.nan
 
-def _coerce(value, kind):
-    if pd.isna(value):
-        return np.nan
-    if kind == "number":
-        return _to_number_locale(value)
-    if kind == "date":
-        try:
-            return pd.to_datetime(value).date()
-        except Exception:
-            return np.nan
-    return str(value).strip().upper()
+# -------- Comparación tipada y vectorizada --------
+# Cada tipo tiene un coerce (Serie -> Serie normalizada) y un kernel de coincidencia (a, b, tol -> máscara).
+
+def _coerce_number(s: pd.Series) -> pd.Series:
+    """Mismo criterio que _to_number_locale ('.' de miles, ',' decimal), sobre toda la serie."""
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        return s.astype(float)
+    is_str = s.map(type).eq(str)
+    out = pd.to_numeric(s.where(~is_str), errors="coerce").astype(float)
+    if is_str.any():
+        txt = s[is_str].str.strip().str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        out[is_str] = pd.to_numeric(txt, errors="coerce")
+    return out
+
+def _coerce_date(s: pd.Series) -> pd.Series:
+    # dayfirst: las fechas de AFIP/Tango vienen como dd/mm/aaaa
+    return pd.to_datetime(s, errors="coerce", dayfirst=True, format="mixed").dt.normalize()
+
+def _coerce_string(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.strip().str.upper().fillna("")
+
+def _coerce_cuit(s: pd.Series) -> pd.Series:
+    # "20202012375.0" (celda numérica leída como float) no debe sumar un dígito
+    txt = s.astype("string").str.strip().str.replace(r"\.0+$", "", regex=True)
+    return txt.str.replace(r"\D+", "", regex=True).fillna("")
+
+def _match_number(a: pd.Series, b: pd.Series, tol: float) -> pd.Series:
+    return (a.isna() & b.isna()) | ((a - b).abs() <= tol)
+
+def _match_date(a: pd.Series, b: pd.Series, tol: float) -> pd.Series:
+    # tolerancia en días
+    return (a.isna() & b.isna()) | ((a - b).abs() <= pd.Timedelta(days=tol))
+
+def _match_equal(a: pd.Series, b: pd.Series, tol: float) -> pd.Series:
+    return a == b
+
+COERCERS = {
+    "number": _coerce_number,
+    "date":   _coerce_date,
+    "string": _coerce_string,
+    "cuit":   _coerce_cuit,
+}
+MATCHERS = {
+    "number": _match_number,
+    "date":   _match_date,
+    "string": _match_equal,
+    "cuit":   _match_equal,
+}
+
+def match_values(a, b, kind: str = "string", tol: float = 0.0) -> pd.Series:
+    """Compara dos series posición a posición según el tipo configurado; devuelve una máscara booleana."""
+    if kind not in COERCERS:
+        raise ValueError(f"Tipo de columna desconocido '{kind}'. Opciones: {list(COERCERS)}")
+    a = a.reset_index(drop=True) if isinstance(a, pd.Series) else pd.Series(a, dtype=object)
+    b = b.reset_index(drop=True) if isinstance(b, pd.Series) else pd.Series(b, dtype=object)
+    coerce = COERCERS[kind]
+    match = MATCHERS[kind](coerce(a), coerce(b), float(tol))
+    return match.fillna(False).astype(bool)
+
+def extra_columns(columns_cfg) -> list:
+    """Columnas configuradas que no son importes (fechas, textos, CUIT...)."""
+    return [c for c in (columns_cfg or []) if c.get("name") not in AMOUNT_COLS]
+
+def extra_checks(merged: pd.DataFrame, columns_cfg) -> Dict[str, tuple]:
+    """
+    Sobre el merge origen/destino, por cada columna extra presente en ambos lados:
+    (máscara de coincidencia, valor de origen normalizado, valor de destino normalizado).
+    """
+    checks = {}
+    for c in extra_columns(columns_cfg):
+        name = c["name"]
+        if f"{name}_origen" not in merged.columns or f"{name}_destino" not in merged.columns:
+            continue
+        kind = c.get("type", "string")
+        if kind not in COERCERS:
+            raise ValueError(f"Tipo de columna desconocido '{kind}'. Opciones: {list(COERCERS)}")
+        a = COERCERS[kind](merged[f"{name}_origen"].reset_index(drop=True))
+        b = COERCERS[kind](merged[f"{name}_destino"].reset_index(drop=True))
+        match = MATCHERS[kind](a, b, float(c.get("tolerance", 0.0))).fillna(False).astype(bool)
+        checks[name] = (match.to_numpy(), a.to_numpy(), b.to_numpy())
+    return checks
 
 def compare_columns(df_merged: pd.DataFrame, keys: list, columns_cfg: list) -> pd.DataFrame:
     results = df_merged.copy()
@@ -32,15 +110,8 @@ def compare_columns(df_merged: pd.DataFrame, keys: list, columns_cfg: list) -> p
         kind = col.get("type", "string")
         tol = float(col.get("tolerance", 0.0))
 
-        a = results[f"{name}_origen"].map(lambda v: _coerce(v, kind))
-        b = results[f"{name}_destino"].map(lambda v: _coerce(v, kind))
-
-        if kind == "number":
-            match = (pd.isna(a) & pd.isna(b)) | (np.abs(a - b) <= tol)
-        else:
-            match = (a.fillna("") == b.fillna(""))
-
-        results[f"__match__{name}"] = match
+        match = match_values(results[f"{name}_origen"], results[f"{name}_destino"], kind, tol)
+        results[f"__match__{name}"] = match.to_numpy()
 
     match_cols = [f"__match__{c['name']}" for c in columns_cfg]
     results["__row_ok__"] = results[match_cols].all(axis=1)
@@ -53,17 +124,53 @@ def _fmt_money_es(v: float) -> str:
     s = f"{v:,.2f}"
     return s.replace(",", "X").replace(".", ",").replace("X", ".")
 
+def _fmt_value(v) -> str:
+    if v is None or pd.isna(v):
+        return ""
+    if isinstance(v, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(v).strftime("%d/%m/%Y")
+    return str(v)
+
 def _fmt_cuit_hyphen(cuit_digits: str) -> str:
     s = str(cuit_digits or "").strip()
     if len(s) == 11 and s.isdigit():
         return f"{s[0:2]}-{s[2:10]}-{s[10:11]}"
     return s
 
-def compare_and_messages(
+def amount_checks(merged: pd.DataFrame, tolerances: Dict[str, float], exact: bool = False) -> Dict[str, tuple]:
+    """
+    Sobre el merge origen/destino (sufijos _origen/_destino) calcula, por columna de importe,
+    (máscara de coincidencia, importe de origen ajustado por TC). Vectorizado.
+    Para Factura C solo cuenta el TOTAL: el resto se da por coincidente.
+    """
+    ncomp = merged["N_COMP"].astype(str).str.strip().str.upper()
+    is_c = ncomp.str[:1].eq("C").to_numpy()
+    tc = merged["TC_origen"] if "TC_origen" in merged.columns else merged.get("TC", pd.Series(1.0, index=merged.index))
+
+    checks = {}
+    for name in AMOUNT_COLS:
+        match, a_adj = amounts_match(
+            merged[f"{name}_origen"], tc, merged[f"{name}_destino"],
+            float(tolerances.get(name, 0.0)), exact=exact,
+        )
+        if name != "IMP_TOTAL":
+            match = match | is_c
+        checks[name] = (match, a_adj)
+    return checks
+
+def build_comparison(
     origen_df: pd.DataFrame,
     destino_df: pd.DataFrame,
     tolerances: Dict[str, float],
-) -> List[str]:
+    exact: bool = False,
+    columns_cfg=None,
+) -> pd.DataFrame:
+    """
+    Una fila por factura de origen con: clave, TC, importes (origen ajustado por TC y destino),
+    columnas extra de columns_cfg (valores normalizados según su tipo), __match__<col>,
+    __row_ok__ y ESTADO (Coincide / No coincide / Omitida).
+    Es la base de los mensajes y del historial.
+    """
     origen_df = origen_df.copy()
     destino_df = destino_df.copy()
     origen_df["N_COMP"] = origen_df["N_COMP"].astype(str).str.strip().str.upper()
@@ -74,51 +181,77 @@ def compare_and_messages(
     keys = ["N_COMP", "IDENTIFTRI"]
     merged = origen_df.merge(destino_df, on=keys, how="left", suffixes=("_origen", "_destino"), indicator=True)
 
-    messages: List[str] = []
-    for _, row in merged.iterrows():
-        ncomp = str(row.get("N_COMP", "")).strip().upper()
-        if row.get("_merge") == "left_only":
-            cuit = _fmt_cuit_hyphen(row.get("IDENTIFTRI", ""))
-            messages.append(f"⚠️ Factura {ncomp} del proveedor {cuit} no se encuentra en destino. Se omite.")
-            continue
+    # Coincidencias por columna (Factura C: solo TOTAL), calculadas para todo el frame de una vez
+    checks = amount_checks(merged, tolerances, exact=exact)
 
-        # Para Factura C, solo TOTAL; para el resto, todas
-        letter = ncomp[0] if ncomp else ""
-        cols_to_check = ("IMP_TOTAL",) if letter == "C" else ("IMP_EXENTO", "IMP_NETO", "IMP_IVA", "IMP_TOTAL")
+    result = merged[keys].copy()
+    if "FECHA" in merged.columns:
+        result["FECHA"] = merged["FECHA"]
+    result["TC"] = merged["TC"] if "TC" in merged.columns else 1.0
+    for name, (match, a_adj) in checks.items():
+        result[f"{name}_origen"]  = a_adj
+        result[f"{name}_destino"] = merged[f"{name}_destino"].map(_to_number_locale).astype(float)
+        result[f"__match__{name}"] = match
+    # Columnas extra (fecha, texto, CUIT): cuentan para todas las letras, también Factura C
+    for name, (match, a, b) in extra_checks(merged, columns_cfg).items():
+        result[f"{name}_origen"]  = a
+        result[f"{name}_destino"] = b
+        result[f"__match__{name}"] = match
+    result["__row_ok__"] = result[[c for c in result.columns if c.startswith("__match__")]].all(axis=1)
 
-        # Tipo de cambio del ORIGEN (si no viene, 1.0)
-        tc_raw = row.get("TC_origen", 1.0)
-        tc = _to_number_locale(tc_raw)
-        if not isinstance(tc, float) or np.isnan(tc):
-            tc = 1.0
+    left_only = (merged["_merge"] == "left_only").to_numpy()
+    result["ESTADO"] = np.where(left_only, STATUS_MISSING, np.where(result["__row_ok__"], STATUS_OK, STATUS_DIFF))
 
-        ok_all = True
-        diffs = []
-        for name in cols_to_check:
-            tol = float(tolerances.get(name, 0.0))
-            av = _to_number_locale(row.get(f"{name}_origen"))
-            bv = _to_number_locale(row.get(f"{name}_destino"))
+    # Procedencia (archivo, hoja y fila de Excel) de cada lado, si los frames la traen
+    for side in ("origen", "destino"):
+        for col in ("ARCHIVO", "HOJA", "FILA"):
+            if f"{col}_{side}" in merged.columns:
+                values = merged[f"{col}_{side}"]
+                result[f"{col}_{side}"] = values.astype("Int64") if col == "FILA" else values
+    return result
 
-            a_adj = av * tc if (isinstance(av, float) and not np.isnan(av)) else av
+def comparison_messages(result: pd.DataFrame) -> List[str]:
+    """Mensajes por factura a partir de build_comparison."""
+    names = [c[len("__match__"):] for c in result.columns if c.startswith("__match__")]
+    match_arr = {name: result[f"__match__{name}"].to_numpy() for name in names}
+    adj_arr   = {name: result[f"{name}_origen"].to_numpy() for name in names}
+    dest_arr  = {name: result[f"{name}_destino"].to_numpy() for name in names}
 
-            # Ambos NaN => ok
-            if (isinstance(a_adj, float) and np.isnan(a_adj)) and (isinstance(bv, float) and np.isnan(bv)):
-                continue
+    messages: List[str] = []
+    ncomps = result["N_COMP"].to_numpy()
+    cuits  = result["IDENTIFTRI"].to_numpy()
+    estados = result["ESTADO"].to_numpy()
+    for i in range(len(result)):
+        ncomp = str(ncomps[i]).strip().upper()
+        if estados[i] == STATUS_MISSING:
+            cuit = _fmt_cuit_hyphen(cuits[i])
+            messages.append(f"⚠️ Factura {ncomp} del proveedor {cuit} no se encuentra en destino. Se omite.")
+            continue
 
-            is_ok = (isinstance(a_adj, float) and isinstance(bv, float) and (abs(a_adj - bv) <= tol))
-            if not is_ok:
-                ok_all = False
-                diffs.append((name, a_adj, bv))
+        diffs = [
+            (name, adj_arr[name][i], dest_arr[name][i])
+            for name in names
+            if not match_arr[name][i]
+        ]
 
-        if ok_all:
+        if not diffs:
             messages.append(f"✅ Factura {ncomp} coincide entre origen y destino.")
         else:
             parts = [
                 f"diferencia en {name.replace('IMP_', '').title()}. Origen: {_fmt_money_es(a_adj)} - Destino: {_fmt_money_es(bv)}"
+                if name in AMOUNT_COLS else
+                f"diferencia en {name}. Origen: {_fmt_value(a_adj)} - Destino: {_fmt_value(bv)}"
                 for name, a_adj, bv in diffs
             ]
             messages.append(f"❌ Factura {ncomp}: " + "; ".join(parts))
 
     return messages
 
-
+def compare_and_messages(
+    origen_df: pd.DataFrame,
+    destino_df: pd.DataFrame,
+    tolerances: Dict[str, float],
+    exact: bool = False,
+    columns_cfg=None,
+) -> List[str]:
+    return comparison_messages(build_comparison(origen_df, destino_df, tolerances, exact=exact, columns_cfg=columns_cfg))
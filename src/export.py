@@ -0,0 +1,82 @@
+"""
+Exportación del resultado de la conciliación en Arrow IPC o Parquet, para herramientas de BI.
+
+Las columnas salen directo de los arrays de compare.build_comparison (sin pasar fila por fila).
+El .arrow se escribe sin compresión para poder abrirlo con memory-map del lado de quien lo lee:
+    pyarrow.ipc.open_file(pyarrow.memory_map("resultados.arrow")).read_all()
+Necesita pyarrow (opcional: solo se importa al exportar).
+"""
+from pathlib import Path
+
+import pandas as pd
+
+from src.compare import AMOUNT_COLS
+from src.xlsx_io import write_atomically
+
+EXPORT_FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+
+# Columnas de texto con pocos valores distintos: se guardan como diccionario
+_DICTIONARY_COLS = {"ESTADO", "ARCHIVO_origen", "HOJA_origen", "ARCHIVO_destino", "HOJA_destino"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Para exportar en Arrow/Parquet hace falta pyarrow: pip install pyarrow")
+    return pa
+
+
+def check_export_format(fmt: str):
+    """Valida el formato y que pyarrow esté instalado (se llama antes del trabajo pesado)."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación desconocido '{fmt}'; opciones: {list(EXPORT_FORMATS)}")
+    _pyarrow()
+
+
+def results_table(comparison: pd.DataFrame):
+    """
+    Tabla de pyarrow con: clave, FECHA, TC, importes de AFIP ajustados por TC (<IMP>_origen),
+    importes de Tango (<IMP>_destino), COINCIDE_<IMP>, las columnas extra de config.yaml (mismo esquema),
+    ESTADO y procedencia (archivo, hoja y fila de Excel).
+    """
+    pa = _pyarrow()
+    cols = ["N_COMP", "IDENTIFTRI", "FECHA", "TC"]
+    extras = [c[len("__match__"):] for c in comparison.columns if c.startswith("__match__")]
+    for name in list(AMOUNT_COLS) + [n for n in extras if n not in AMOUNT_COLS]:
+        cols += [f"{name}_origen", f"{name}_destino", f"__match__{name}"]
+    cols += ["ESTADO", "ARCHIVO_origen", "HOJA_origen", "FILA_origen", "ARCHIVO_destino", "HOJA_destino", "FILA_destino"]
+
+    arrays, names = [], []
+    for col in cols:
+        if col not in comparison.columns:
+            continue
+        s = comparison[col]
+        if col.startswith("HOJA_"):
+            s = s.astype(str).where(s.notna(), None)   # la hoja puede venir como nombre o como índice
+        # pyarrow toma los buffers de numpy tal cual (NaN/NA -> nulo); el texto repetitivo va como diccionario
+        arr = pa.array(s, from_pandas=True)
+        if col in _DICTIONARY_COLS:
+            arr = arr.dictionary_encode()
+        arrays.append(arr)
+        names.append(col.replace("__match__", "COINCIDE_"))
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def write_results(comparison: pd.DataFrame, out_path, fmt: str = "arrow", atomic: bool = True) -> Path:
+    """Escribe el resultado en `out_path` como Arrow IPC (.arrow) o Parquet; devuelve la ruta escrita."""
+    check_export_format(fmt)
+    pa = _pyarrow()
+    table = results_table(comparison)
+
+    if fmt == "arrow":
+        def write(target):
+            with pa.OSFile(str(target), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        import pyarrow.parquet as pq
+
+        def write(target):
+            pq.write_table(table, str(target))
+
+    return write_atomically(out_path, write, atomic=atomic)
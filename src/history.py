@@ -0,0 +1,207 @@
+"""
+Historial de conciliaciones en SQLite: cada corrida agrega sus resultados por factura.
+
+Consultas desde consola:
+    python -m src.history --db outputs/historial.sqlite --cuit 20202012375 --estado "No coincide" --desde 2025-06
+"""
+import sys
+import uuid
+import sqlite3
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.compare import AMOUNT_COLS, STATUS_OK, STATUS_DIFF, STATUS_MISSING
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    started_at  TEXT NOT NULL,
+    origen      TEXT,
+    destino     TEXT,
+    facturas    INTEGER,
+    coinciden   INTEGER,
+    no_coinciden INTEGER,
+    omitidas    INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id      TEXT NOT NULL REFERENCES runs(run_id),
+    n_comp      TEXT NOT NULL,
+    cuit        TEXT,
+    letra       TEXT,
+    periodo     TEXT,
+    fecha       TEXT,
+    tc          REAL,
+    estado      TEXT NOT NULL,
+    {amount_cols}
+);
+CREATE INDEX IF NOT EXISTS ix_results_cuit_periodo ON results(cuit, periodo);
+CREATE INDEX IF NOT EXISTS ix_results_ncomp        ON results(n_comp, cuit);
+CREATE INDEX IF NOT EXISTS ix_results_periodo      ON results(periodo, estado);
+CREATE INDEX IF NOT EXISTS ix_results_estado       ON results(estado, periodo);
+CREATE INDEX IF NOT EXISTS ix_results_run          ON results(run_id);
+"""
+
+
+def _amount_fields():
+    """Por cada importe: origen (ajustado por TC), destino y diferencia."""
+    fields = []
+    for name in AMOUNT_COLS:
+        col = name.replace("IMP_", "").lower()
+        fields += [f"{col}_origen", f"{col}_destino", f"{col}_dif"]
+    return fields
+
+
+_FIELDS = ["run_id", "n_comp", "cuit", "letra", "periodo", "fecha", "tc", "estado"] + _amount_fields()
+
+
+class HistoryStore:
+    """Almacén local (un archivo .sqlite) con los resultados de todas las corridas."""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        amount_cols = ",\n    ".join(f"{f} REAL" for f in _amount_fields())
+        self.conn.executescript(_SCHEMA.format(amount_cols=amount_cols))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append_run(self, result: pd.DataFrame, origen: str = "", destino: str = "", run_id: Optional[str] = None) -> str:
+        """
+        Agrega una corrida (salida de compare.build_comparison) en una sola transacción.
+        El período sale de FECHA (YYYY-MM); si no hay fecha, se usa el mes de la corrida.
+        """
+        started = datetime.now()
+        run_id = run_id or f"{started:%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+        n = len(result)
+        fecha = pd.to_datetime(result["FECHA"], errors="coerce") if "FECHA" in result.columns else pd.Series(pd.NaT, index=result.index)
+        # datetime64 -> texto en numpy (strftime de pandas es mucho más lento)
+        fvals = fecha.to_numpy(dtype="datetime64[ns]")
+        has_fecha = ~np.isnat(fvals)
+        periodo = np.where(has_fecha, fvals.astype("datetime64[M]").astype(str), f"{started:%Y-%m}").astype(object)
+        fecha_txt = np.where(has_fecha, fvals.astype("datetime64[D]").astype(str), None)
+        ncomp = result["N_COMP"].astype(str)
+
+        cols = {
+            "run_id":  np.full(n, run_id, dtype=object),
+            "n_comp":  ncomp.to_numpy(dtype=object),
+            "cuit":    result["IDENTIFTRI"].astype(str).replace({"<NA>": None, "nan": None}).to_numpy(dtype=object),
+            "letra":   ncomp.str[:1].to_numpy(dtype=object),
+            "periodo": periodo,
+            "fecha":   fecha_txt,
+            "tc":      pd.to_numeric(result["TC"], errors="coerce").to_numpy(dtype=float) if "TC" in result.columns else np.full(n, np.nan),
+            "estado":  result["ESTADO"].to_numpy(dtype=object),
+        }
+        for name in AMOUNT_COLS:
+            col = name.replace("IMP_", "").lower()
+            a = result[f"{name}_origen"].astype(float)
+            b = result[f"{name}_destino"].astype(float)
+            cols[f"{col}_origen"]  = a.to_numpy()
+            cols[f"{col}_destino"] = b.to_numpy()
+            cols[f"{col}_dif"]     = (a - b).to_numpy()
+
+        # NaN -> NULL para SQLite; columnas como listas y zip para el executemany
+        def as_list(arr):
+            arr = np.asarray(arr)
+            if arr.dtype.kind == "f":
+                return np.where(np.isnan(arr), None, arr).tolist()
+            return [None if (v is None or v is pd.NA or v != v) else v for v in arr.tolist()]
+        rows = zip(*(as_list(cols[f]) for f in _FIELDS))
+
+        counts = result["ESTADO"].value_counts()
+        placeholders = ", ".join("?" for _ in _FIELDS)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id, started.isoformat(timespec="seconds"), str(origen), str(destino), int(n),
+                    int(counts.get(STATUS_OK, 0)), int(counts.get(STATUS_DIFF, 0)), int(counts.get(STATUS_MISSING, 0)),
+                ),
+            )
+            self.conn.executemany(f"INSERT INTO results ({', '.join(_FIELDS)}) VALUES ({placeholders})", rows)
+        return run_id
+
+    def query(
+        self,
+        cuit: Optional[str] = None,
+        n_comp: Optional[str] = None,
+        desde: Optional[str] = None,
+        hasta: Optional[str] = None,
+        estado: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Resultados filtrados por CUIT, comprobante, rango de períodos (YYYY-MM, inclusive) y estado.
+        Todos los filtros usan columnas indexadas.
+        """
+        where, params = [], []
+        if cuit:
+            where.append("r.cuit = ?")
+            params.append("".join(ch for ch in str(cuit) if ch.isdigit()))
+        if n_comp:
+            where.append("r.n_comp = ?")
+            params.append("".join(str(n_comp).split()).upper())
+        if desde:
+            where.append("r.periodo >= ?")
+            params.append(desde)
+        if hasta:
+            where.append("r.periodo <= ?")
+            params.append(hasta)
+        if estado:
+            where.append("r.estado = ?")
+            params.append(estado)
+        sql = "SELECT r.*, u.started_at FROM results r JOIN runs u ON u.run_id = r.run_id"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.periodo, u.started_at, r.n_comp"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def runs(self) -> pd.DataFrame:
+        return pd.read_sql_query("SELECT * FROM runs ORDER BY started_at", self.conn)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Consulta el historial de conciliaciones.")
+    ap.add_argument("--db", required=True, help="Archivo .sqlite del historial")
+    ap.add_argument("--cuit")
+    ap.add_argument("--n-comp")
+    ap.add_argument("--desde", help="Período inicial YYYY-MM")
+    ap.add_argument("--hasta", help="Período final YYYY-MM")
+    ap.add_argument("--estado", choices=[STATUS_OK, STATUS_DIFF, STATUS_MISSING])
+    ap.add_argument("--limit", type=int, default=200)
+    ap.add_argument("--corridas", action="store_true", help="Lista las corridas registradas")
+    args = ap.parse_args(argv)
+
+    with HistoryStore(args.db) as store:
+        if args.corridas:
+            df = store.runs()
+        else:
+            df = store.query(
+                cuit=args.cuit, n_comp=args.n_comp, desde=args.desde,
+                hasta=args.hasta, estado=args.estado, limit=args.limit,
+            )
+    if df.empty:
+        print("Sin resultados.")
+    else:
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
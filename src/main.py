@@ -1,12 +1,21 @@
+import os
 import sys
 import yaml
+import argparse
+import pandas as pd
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional, Dict, Any
 
-from src.transform import load_afip_with_map, load_tango_with_map
-from src.compare import compare_and_messages
+from src.transform import load_afip_with_map, load_tango_with_map, _normalize_cuit
+from src.compare import build_comparison, comparison_messages, AMOUNT_COLS, STATUS_OK, STATUS_MISSING
+from src.history import HistoryStore
+from src.preflight import run_preflight, PreflightError
+from src.triage import supplier_summary, summary_messages, write_summary
 from src.origen_validated import write_origen_validado
-from src.mark_dest import mark_and_append
+from src.mark_dest import mark_file_sheets
+from src.export import write_results, check_export_format, EXPORT_FORMATS
+from src.sources import expand_sources, load_parts, collapse_keys, part_labels
 
 
 def _base_dir() -> Path:
@@ -19,6 +28,16 @@ def _base_dir() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
+def _program_dir() -> Path:
+    """
+    Carpeta del programa para datos que tienen que durar entre corridas (p. ej. el historial):
+    junto al ejecutable cuando está empaquetado (sys._MEIPASS se borra al salir), si no _base_dir().
+    """
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return _base_dir()
+
+
 def _load_config(config_path: Optional[str] = None) -> dict:
     """
     Busca config.yaml en:
@@ -42,27 +61,45 @@ def _load_config(config_path: Optional[str] = None) -> dict:
 
 # --- API para la GUI (importa launcher_gui_bootstrap.py) ---
 def run_validation(
-    origen_path: str,
-    destino_path: str,
-    origen_sheet: Optional[str] = None,
-    destino_sheet: Optional[str] = None,
+    origen_path,
+    destino_path,
+    origen_sheet=None,
+    destino_sheet=None,
     output_dir: Optional[str] = None,
+    exact_money: Optional[bool] = None,
+    cfg: Optional[dict] = None,
+    mode: str = "full",
+    cuits: Optional[list] = None,
+    export_format: Optional[str] = None,
+    write_xlsx: Optional[bool] = None,
 ) -> Dict[str, Any]:
     """
     Ejecuta todo el pipeline usando tu lógica actual
-    y devuelve paths de salida + métricas para la GUI.
+    y devuelve paths de salida + métricas para la GUI
+    (incluye "comparacion", el frame de build_comparison, para el visor de resultados).
+    exact_money: compara importes en centavos enteros (por defecto, lo que diga config.yaml).
+    cfg: config ya cargada (el watcher la reutiliza entre corridas); si no, se lee config.yaml.
+    mode="triage": solo resumen por proveedor (CUIT y letra) en triage_proveedores.xlsx, sin marcar.
+    cuits: corre la comparación completa solo para esos CUIT (drill-down después del triage).
+    origen_path/destino_path y las hojas aceptan listas o globs (ver src/sources.py): las partes
+    se parsean en paralelo y se concatenan; con varias partes hay una salida por archivo
+    (destino_validado_<archivo>.xlsx) y por archivo/hoja de origen (origen_validado_<archivo>.xlsx).
+    export_format: "arrow" o "parquet" escribe además resultados.<ext> (ver src/export.py).
+    write_xlsx=False: no genera los .xlsx de salida (corridas batch sin GUI).
+    Ambos por defecto según config.yaml.
     """
-    cfg = _load_config()
+    cfg = cfg if cfg is not None else _load_config()
+    exact = bool(cfg.get("exact_money", False)) if exact_money is None else bool(exact_money)
 
     origen_sheet  = origen_sheet  or cfg.get("origen_sheet", "Sheet1")
     destino_sheet = destino_sheet or cfg.get("destino_sheet", "Hoja1")
     mapping       = cfg["mapping"]
+    export_format = (cfg.get("export_format") or None) if export_format is None else (export_format or None)
+    write_xlsx    = bool(cfg.get("write_xlsx", True)) if write_xlsx is None else bool(write_xlsx)
+    if export_format:
+        check_export_format(export_format)
 
-    # 1) Normalizamos AFIP/Tango según el mapeo
-    df_afip  = load_afip_with_map(origen_path,  origen_sheet,  mapping)
-    df_tango = load_tango_with_map(destino_path, destino_sheet, mapping)
-
-    # 2) Columnas a comparar 
+    # Columnas a comparar 
     columns_cfg = cfg.get("columns", [
         {"name": "IMP_EXENTO", "type": "number", "tolerance": 0.01},
         {"name": "IMP_NETO",   "type": "number", "tolerance": 0.01},
@@ -70,69 +107,195 @@ def run_validation(
         {"name": "IMP_TOTAL",  "type": "number", "tolerance": 0.01},
     ])
 
-    # 3) Mensajes
+    # 0) Pre-flight: hojas y encabezados contra el mapeo, antes del parseo pesado
+    if cfg.get("preflight", True):
+        run_preflight(origen_path, destino_path, origen_sheet, destino_sheet, mapping, columns_cfg)
+
+    # 1) Normalizamos AFIP/Tango según el mapeo; cada archivo/hoja es una parte con su procedencia
+    keys = ["N_COMP", "IDENTIFTRI"]
+    origen_parts  = expand_sources(origen_path,  origen_sheet)
+    destino_parts = expand_sources(destino_path, destino_sheet)
+    parallel_load = bool(cfg.get("parallel_load", True))
+    df_afip  = load_parts(load_afip_with_map,  origen_parts,  mapping, parallel=parallel_load)
+    tango_by_part = load_parts(load_tango_with_map, destino_parts, mapping, parallel=parallel_load)
+    # Para comparar, una fila por factura aunque aparezca en más de una parte
+    df_tango = collapse_keys(tango_by_part, keys, AMOUNT_COLS)
+
     tolerances = {c["name"]: float(c.get("tolerance", 0.0)) for c in columns_cfg}
-    msgs = compare_and_messages(
+    out_dir = Path(output_dir) if output_dir else (_base_dir() / "outputs")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    save_opts = {
+        "compression": cfg.get("xlsx_compression", "default"),
+        "atomic":      bool(cfg.get("atomic_save", True)),
+    }
+
+    # Triage: solo sumas por proveedor/letra, sin comparación por factura ni marcas
+    if mode == "triage":
+        summary = supplier_summary(df_afip, df_tango, tolerances, exact=exact)
+        msgs = summary_messages(summary)
+        for m in msgs:
+            print(m)
+        triage_path = write_summary(summary, str(out_dir / "triage_proveedores.xlsx"), **save_opts)
+        return {
+            "triage":       str(triage_path),
+            "resumen":      summary,
+            "proveedores_no_coinciden": int((summary["ESTADO"] != STATUS_OK).sum()),
+            "mensajes":     msgs,
+        }
+
+    # Drill-down: comparación completa solo para los CUIT elegidos
+    if cuits:
+        cuits = {c for c in (_normalize_cuit(x) for x in cuits) if not pd.isna(c)}
+        df_afip  = df_afip[df_afip["IDENTIFTRI"].isin(cuits)].reset_index(drop=True)
+        df_tango = df_tango[df_tango["IDENTIFTRI"].isin(cuits)].reset_index(drop=True)
+
+    # 2) Mensajes
+    comparison = build_comparison(
         origen_df=df_afip,
         destino_df=df_tango,
         tolerances=tolerances,
+        exact=exact,
+        columns_cfg=columns_cfg,
     )
+    msgs = comparison_messages(comparison)
     for m in msgs:
         print(m)
 
-    # 4) Generamos copia del destino con marcas visuales
-    out_dir = Path(output_dir) if output_dir else (_base_dir() / "outputs")
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    destino_validado_name = Path(cfg.get("output_file", "destino_validado.xlsx")).name
-    destino_validado_path = out_dir / destino_validado_name
-
-    faltantes = mark_and_append(
-        origen_df=df_afip,
-        destino_xlsx_path=destino_path,
-        destino_sheet=destino_sheet,
+    # 3) Copia de cada archivo de destino con marcas visuales; a cada hoja van las facturas que tiene
+    destino_validado_name = Path(cfg.get("output_file", "destino_validado.xlsx"))
+    destino_files = list(dict.fromkeys(path for path, _ in destino_parts))
+    mark_opts = dict(
         columns_cfg=columns_cfg,
-        out_path=str(destino_validado_path),
+        mode=cfg.get("mark_mode", "targeted"),
+        **save_opts,
     )
+    tasks = []
+    destino_labels = part_labels([(f, None) for f in destino_files])
+    for path, label in zip(destino_files, destino_labels) if write_xlsx else []:
+        # Las marcas salen de la comparación (contra la suma de todas las partes), en la fila de procedencia
+        sheet_jobs = [
+            (sheet, comparison[(comparison["ARCHIVO_destino"] == p) & (comparison["HOJA_destino"] == sheet)])
+            for p, sheet in destino_parts if p == path
+        ]
+        tasks.append((mark_file_sheets, dict(
+            destino_xlsx_path=path,
+            sheet_jobs=sheet_jobs,
+            out_path=str(out_dir / f"{destino_validado_name.stem}{label}{destino_validado_name.suffix}"),
+            **mark_opts,
+        )))
+    n_destino = len(tasks)
 
-    # 5) Origen validado
-    origen_validado_path = out_dir / "origen_validado.xlsx"
-    write_origen_validado(
-        origen_path=origen_path,
-        sheet=origen_sheet,
-        mapping=mapping,
-        destino_df=df_tango,
-        tolerances=tolerances,
-        out_path=str(origen_validado_path),
-    )
+    # 4) Origen validado, uno por archivo/hoja de origen (con el ESTADO de la comparación)
+    origen_labels = part_labels(origen_parts)
+    for (path, sheet), label in zip(origen_parts, origen_labels) if write_xlsx else []:
+        tasks.append((write_origen_validado, dict(
+            origen_path=path,
+            sheet=sheet,
+            comparison=comparison[(comparison["ARCHIVO_origen"] == path) & (comparison["HOJA_origen"] == sheet)],
+            out_path=str(out_dir / f"origen_validado{label}.xlsx"),
+            cuits=cuits or None,
+            **save_opts,
+        )))
+
+    # Las salidas son independientes: en paralelo cada una serializa su libro en su propio proceso
+    if cfg.get("parallel_save", True) and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+            futures = [pool.submit(fn, **kwargs) for fn, kwargs in tasks]
+            outputs = [f.result() for f in futures]
+    else:
+        outputs = [fn(**kwargs) for fn, kwargs in tasks]
+
+    destinos_validados = [path for path, _ in outputs[:n_destino]]
+    origenes_validados = [str(path) for path in outputs[n_destino:]]
+    # Faltantes: facturas de AFIP que no están en ninguna parte de Tango (+ las que no se hallaron al marcar)
+    faltantes = int((comparison["ESTADO"] == STATUS_MISSING).sum()) + sum(m for _, m in outputs[:n_destino])
+
+    # 5) Resultado en Arrow/Parquet para herramientas de BI
+    export_path = None
+    if export_format:
+        export_path = write_results(
+            comparison, out_dir / f"resultados{EXPORT_FORMATS[export_format]}",
+            fmt=export_format, atomic=save_opts["atomic"],
+        )
+
+    # 6) Historial: resultados por factura de esta corrida
+    run_id = None
+    history_db = cfg.get("history_db")
+    if history_db:
+        # Relativa a la carpeta del programa, no al directorio desde donde se lanzó el proceso
+        db_path = Path(history_db).expanduser()
+        if not db_path.is_absolute():
+            db_path = _program_dir() / db_path
+        with HistoryStore(db_path) as store:
+            run_id = store.append_run(
+                comparison,
+                origen="; ".join(dict.fromkeys(p for p, _ in origen_parts)),
+                destino="; ".join(destino_files),
+            )
 
     return {
-        "destino_validado": str(destino_validado_path),
-        "origen_validado":  str(origen_validado_path),
-        "faltantes":        int(faltantes),
+        "destino_validado": destinos_validados[0] if destinos_validados else None,
+        "origen_validado":  origenes_validados[0] if origenes_validados else None,
+        "destinos_validados": destinos_validados,
+        "origenes_validados": origenes_validados,
+        "faltantes":        faltantes,
         "mensajes":         msgs,
+        "comparacion":      comparison,
+        "export":           str(export_path) if export_path else None,
+        "run_id":           run_id,
     }
 
 
 # --- Modo CLI ---
-def main():
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Valida facturas AFIP contra Tango (por defecto, archivos de data/).")
+    ap.add_argument("--triage", action="store_true", help="Solo resumen por proveedor, sin marcar facturas")
+    ap.add_argument("--cuit", action="append", help="Comparación completa solo para este CUIT (se puede repetir)")
+    ap.add_argument("--origen", nargs="+", help="Archivo(s) o glob de AFIP (por defecto data/origen.xlsx)")
+    ap.add_argument("--destino", nargs="+", help="Archivo(s) o glob de Tango (por defecto data/destino.xlsx)")
+    ap.add_argument("--hoja-origen", nargs="+", help="Hoja(s) de AFIP; '*' = todas")
+    ap.add_argument("--hoja-destino", nargs="+", help="Hoja(s) de Tango; '*' = todas")
+    ap.add_argument("--export", choices=sorted(EXPORT_FORMATS), help="Escribe también outputs/resultados.arrow|.parquet")
+    ap.add_argument("--sin-xlsx", action="store_true", help="No genera los .xlsx de salida")
+    args = ap.parse_args(argv)
+
     cfg = _load_config()
 
-    origen_path   = str(_base_dir() / "data" / "origen.xlsx")
-    destino_path  = str(_base_dir() / "data" / "destino.xlsx")
-    origen_sheet  = cfg.get("origen_sheet", "Sheet1")
-    destino_sheet = cfg.get("destino_sheet", "Hoja1")
-
-    result = run_validation(
-        origen_path=origen_path,
-        destino_path=destino_path,
-        origen_sheet=origen_sheet,
-        destino_sheet=destino_sheet,
-        output_dir=str(_base_dir() / "outputs"),
-    )
+    origen_path   = args.origen  or str(_base_dir() / "data" / "origen.xlsx")
+    destino_path  = args.destino or str(_base_dir() / "data" / "destino.xlsx")
+    origen_sheet  = args.hoja_origen  or cfg.get("origen_sheet", "Sheet1")
+    destino_sheet = args.hoja_destino or cfg.get("destino_sheet", "Hoja1")
+
+    try:
+        result = run_validation(
+            origen_path=origen_path,
+            destino_path=destino_path,
+            origen_sheet=origen_sheet,
+            destino_sheet=destino_sheet,
+            output_dir=str(_base_dir() / "outputs"),
+            cfg=cfg,
+            mode="triage" if args.triage else "full",
+            cuits=args.cuit,
+            export_format=args.export,
+            write_xlsx=False if args.sin_xlsx else None,
+        )
+    except PreflightError as e:
+        # Problemas de esquema: se listan todos juntos, sin traceback
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if args.triage:
+        print(f"✅ Resumen por proveedor: {result['triage']}")
+        n = result["proveedores_no_coinciden"]
+        print(f"⚠️ {n} proveedor(es)/letra(s) no concilian." if n else "✅ Todos los proveedores concilian.")
+        return
 
-    print(f"✅ Archivo de salida (destino): {result['destino_validado']}")
-    print(f"✅ Archivo de salida (origen) : {result['origen_validado']}")
+    for path in result["destinos_validados"]:
+        print(f"✅ Archivo de salida (destino): {path}")
+    for path in result["origenes_validados"]:
+        print(f"✅ Archivo de salida (origen) : {path}")
+    if result["export"]:
+        print(f"✅ Resultados para BI          : {result['export']}")
     if result["faltantes"]:
         print(f"⚠️ Hay {result['faltantes']} factura(s) de AFIP sin coincidencia en Tango.")
     else:
@@ -140,4 +303,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -2,79 +2,78 @@ from openpyxl.styles import PatternFill, Font
 from openpyxl import load_workbook
 from pathlib import Path
 import pandas as pd
-import numpy as np
 
-from src.transform import _normalize_cuit, _normalize_name, _to_number_locale
+from src.transform import _normalize_cuit, _normalize_ncomp
+from src.xlsx_io import save_workbook
+from src.xlsx_patch import mark_cells, UnsupportedPackage
 
 YELLOW = PatternFill(start_color="FFF59D", end_color="FFF59D", fill_type="solid")  # diferencias
 
-def _coerce_for_compare(x, kind):
-    if kind == "number":
-        v = _to_number_locale(x)
-        return np.nan if v is pd.NA else float(v)
-    if kind == "date":
-        try:
-            return pd.to_datetime(x).date()
-        except Exception:
-            return np.nan
-    # string
-    s = "" if x is pd.NA else str(x)
-    return s.strip().upper()
-
-def _compare_with_tolerance(a, b, kind, tol):
-    a = _coerce_for_compare(a, kind)
-    b = _coerce_for_compare(b, kind)
-    if kind == "number":
-        if (isinstance(a, float) and np.isnan(a)) and (isinstance(b, float) and np.isnan(b)):
-            return True
-        if isinstance(a, float) and isinstance(b, float):
-            return abs(a - b) <= tol
-        return False
-    else:
-        a = "" if (isinstance(a, float) and np.isnan(a)) else a
-        b = "" if (isinstance(b, float) and np.isnan(b)) else b
-        return a == b
-
-def _build_ws_key_index(ws, colmap):
+def _read_ws_keys(ws, colmap):
     """
-    Recorre la hoja destino para construir un índice:
-    key = (N_COMP_normalizado, CUIT_normalizado) -> lista de rownums
+    Una sola pasada por la hoja (sirve en modo normal y read_only):
+    (N_COMP_normalizado, CUIT_normalizado) -> conjunto de rownums.
     colmap: dict nombre_col -> indice_columna (1-based)
     """
+    j_ncomp, j_cuit = colmap["N_COMP"] - 1, colmap["IDENTIFTRI"] - 1
     key_to_rows = {}
-    for r in range(2, ws.max_row + 1):
-        ncomp_cell = ws.cell(row=r, column=colmap["N_COMP"]).value
-        cuit_cell  = ws.cell(row=r, column=colmap["IDENTIFTRI"]).value
-        ncomp = str(ncomp_cell).strip().upper() if ncomp_cell is not None else ""
+    for r, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+        ncomp_cell = row[j_ncomp] if j_ncomp < len(row) else None
+        cuit_cell  = row[j_cuit]  if j_cuit  < len(row) else None
         cuit_norm = _normalize_cuit(cuit_cell)
         cuit = "" if pd.isna(cuit_norm) else str(cuit_norm)   # ← evita "or ''" con pd.NA
-        key = (ncomp, cuit)
-        key_to_rows.setdefault(key, []).append(r)
+        key_to_rows.setdefault((_normalize_ncomp(ncomp_cell), cuit), set()).add(r)
     return key_to_rows
 
 def _ensure_headers(ws, needed):
     """Devuelve un dict nombre_col -> idx, error si falta alguna columna necesaria."""
-    header = {ws.cell(row=1, column=j).value: j for j in range(1, ws.max_column + 1)}
+    first = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    header = {v: j for j, v in enumerate(first, start=1) if v is not None}
     missing = [c for c in needed if c not in header]
     if missing:
         raise KeyError(f"En la hoja '{ws.title}' faltan columnas: {missing}")
     return header
 
+def _apply_marks_openpyxl(ws, marks):
+    for r, j in marks:
+        cell = ws.cell(row=r, column=j)
+        cell.fill = YELLOW
+        current_font = cell.font
+        cell.font = Font(
+            name=getattr(current_font, "name", None),
+            size=getattr(current_font, "sz", None),
+            bold=True,
+            underline="single",
+        )
+
 def mark_and_append(
-    origen_df: pd.DataFrame,
+    comparison: pd.DataFrame,
     destino_xlsx_path: str,
     destino_sheet: str,
     columns_cfg: list,
     out_path: str,
+    compression: str = "default",
+    atomic: bool = True,
+    mode: str = "targeted",
 ):
     """
     - Abre el Excel de destino desde disco (sin copiar con shutil) y lo guarda como un archivo nuevo.
-    - Marca en amarillo las celdas de Tango que no coinciden contra AFIP.
-    - NO inserta filas nuevas; solo devuelve cuántas faltaron (missing_count).
+    - Marca en amarillo las celdas de Tango que no coinciden contra AFIP, según compare.build_comparison:
+      `comparison` son las facturas de esta hoja (HOJA_destino) y se marca la fila FILA_destino en cada
+      columna de columns_cfg con __match__<col> en falso. Así una factura repartida en varias partes
+      se marca (o no) igual que su ESTADO, que compara contra la suma de todas las partes.
+    - NO inserta filas nuevas; devuelve (ruta escrita, missing_count): facturas cuya fila ya no está
+      en la hoja. La ruta puede ser un nombre alternativo si la salida estaba abierta
+      (ver src/xlsx_io.write_atomically).
+    - compression/atomic: ver src/xlsx_io.save_workbook.
+    - mode="targeted": lee solo la hoja destino en modo streaming y reescribe únicamente
+      esa hoja y los estilos (src/xlsx_patch.py); "full" carga y guarda el libro entero con openpyxl.
     """
+    targeted = mode == "targeted"
+
     # 1) Abrimos el workbook de destino original
     try:
-        wb = load_workbook(destino_xlsx_path)
+        wb = load_workbook(destino_xlsx_path, read_only=targeted)
     except PermissionError:
         raise PermissionError(
             f"No se pudo abrir '{destino_xlsx_path}'. Cerrá el archivo si está abierto en Excel."
@@ -83,17 +82,6 @@ def mark_and_append(
     out_file = Path(out_path)
     out_file.parent.mkdir(parents=True, exist_ok=True)
 
-    def save_wb_safely(workbook, path: Path):
-        try:
-            workbook.save(path)
-            return path
-        except PermissionError:
-            from datetime import datetime
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            alt = path.with_name(f"{path.stem}_{ts}{path.suffix}")
-            workbook.save(alt)
-            return alt
-
     # 2) Seleccionamos la hoja del workbook cargado
     if destino_sheet not in wb.sheetnames:
         raise ValueError(f"No existe la hoja '{destino_sheet}' en {destino_xlsx_path}")
@@ -104,53 +92,59 @@ def mark_and_append(
     header = _ensure_headers(ws, needed)
 
     # 4) Índice por clave en la hoja: (N_COMP, IDENTIFTRI) -> filas
-    key_to_rows = _build_ws_key_index(ws, header)
-
-    # 5) Recorremos AFIP y validamos
-    missing_afip_rows = []
-
-    for _, row in origen_df.iterrows():
-        ncomp = str(row["N_COMP"]).strip().upper()
-        cuit_norm = _normalize_cuit(row["IDENTIFTRI"])
-        cuit = "" if pd.isna(cuit_norm) else str(cuit_norm)
-        key = (ncomp, cuit)
-
-        if key in key_to_rows and len(key_to_rows[key]) > 0:
-            r = key_to_rows[key][0]
-            letter = ncomp[0] if ncomp else ""
-            if letter == "C":
-                cols_to_check = [c for c in columns_cfg if c["name"] == "IMP_TOTAL"]
-            else:
-                cols_to_check = columns_cfg
-            tc_raw = row.get("TC", 1.0)
-            tc = _to_number_locale(tc_raw)
-            if not isinstance(tc, float) or np.isnan(tc):
-                tc = 1.0
-            for colinfo in cols_to_check:
-                name = colinfo["name"]
-                kind = colinfo.get("type", "string")
-                tol  = float(colinfo.get("tolerance", 0.0))
-                ws_val = ws.cell(row=r, column=header[name]).value
-                if kind == "number":
-                    a_num = _to_number_locale(row[name])
-                    a_adj = (a_num * tc) if (isinstance(a_num, float) and not np.isnan(a_num)) else a_num
-                    ok = _compare_with_tolerance(a_adj, ws_val, kind, tol)
-                else:
-                    ok = _compare_with_tolerance(row[name], ws_val, kind, tol)
-
-                if not ok:
-                    ws.cell(row=r, column=header[name]).fill = YELLOW
-                    current_font = ws.cell(row=r, column=header[name]).font
-                    ws.cell(row=r, column=header[name]).font = Font(
-                        name=getattr(current_font, "name", None),
-                        size=getattr(current_font, "sz", None),
-                        bold=True,
-                        underline="single",
-                    )
-        else:
-            missing_afip_rows.append(row) 
-
-    # 6) Guardar de forma segura
-    missing_count = len(missing_afip_rows)
-    save_wb_safely(wb, out_file)
-    return missing_count
+    key_to_rows = _read_ws_keys(ws, header)
+    if targeted:
+        wb.close()
+
+    # 5) Celdas a marcar: la fila de Tango de cada factura en las columnas que no coinciden
+    names = [c["name"] for c in columns_cfg if f"__match__{c['name']}" in comparison.columns]
+    filas = comparison["FILA_destino"].to_numpy()
+    ncomps = comparison["N_COMP"].map(_normalize_ncomp).to_numpy()
+    cuits = comparison["IDENTIFTRI"].map(_normalize_cuit).to_numpy()
+    matches = {name: comparison[f"__match__{name}"].to_numpy(dtype=bool) for name in names}
+
+    marks, missing_count = [], 0
+    for i in range(len(comparison)):
+        cuit = "" if pd.isna(cuits[i]) else str(cuits[i])
+        r = None if pd.isna(filas[i]) else int(filas[i])
+        if r not in key_to_rows.get((ncomps[i], cuit), ()):
+            missing_count += 1   # la hoja cambió desde la lectura: no se marca una fila ajena
+            continue
+        marks.extend((r, header[name]) for name in names if not matches[name][i])
+
+    # 6) Marcar y guardar de forma segura
+    if targeted:
+        try:
+            written = mark_cells(
+                destino_xlsx_path, out_file, destino_sheet, marks,
+                fill_rgb=YELLOW.start_color.rgb, compression=compression, atomic=atomic,
+            )
+            return written, missing_count
+        except UnsupportedPackage as e:
+            print(f"ℹ️ Marcado dirigido no disponible ({e}); se usa openpyxl.")
+            wb = load_workbook(destino_xlsx_path)
+            ws = wb[destino_sheet]
+
+    _apply_marks_openpyxl(ws, marks)
+    written = save_workbook(wb, out_file, compression=compression, atomic=atomic)
+    return written, missing_count
+
+
+def mark_file_sheets(destino_xlsx_path: str, sheet_jobs, out_path: str, **kwargs):
+    """
+    Marca varias hojas de un mismo archivo de Tango en una sola salida.
+    sheet_jobs: lista de (hoja, filas de build_comparison con HOJA_destino en esa hoja).
+    Cada hoja parte del archivo que realmente escribió la anterior (puede ser un nombre
+    alternativo si la salida estaba abierta); devuelve (ruta escrita, faltantes sumados).
+    """
+    src, target, written, missing = destino_xlsx_path, out_path, out_path, 0
+    for i, (sheet, comparison) in enumerate(sheet_jobs):
+        opts = dict(kwargs)
+        if i:
+            opts["atomic"] = True   # se lee y se escribe el mismo archivo
+        written, count = mark_and_append(
+            comparison=comparison, destino_xlsx_path=src, destino_sheet=sheet, out_path=target, **opts
+        )
+        missing += count
+        src = target = written
+    return str(written), missing
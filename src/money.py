@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from src.transform import _to_number_locale
+
+# Importes en centavos (2 decimales) y tipo de cambio con 6 decimales
+CENTS_DECIMALS = 2
+RATE_DECIMALS  = 6
+
+# Dígitos de guarda al escalar floats: absorben el error binario (0.285 * 100 = 28.4999...)
+_GUARD_DECIMALS = 3
+
+_NUM_RE = r"^([+-]?)(?=\d|\.\d)(\d*)(?:\.(\d*))?$"
+
+
+def _half_up_div(n: np.ndarray, k: int) -> np.ndarray:
+    """División entera n / k redondeando la mitad lejos de cero (redondeo comercial)."""
+    return np.sign(n) * ((np.abs(n) + k // 2) // k)
+
+
+def _scale_floats(arr: np.ndarray, decimals: int):
+    valid = np.isfinite(arr)
+    guard = 10 ** _GUARD_DECIMALS
+    g = np.rint(np.where(valid, arr, 0.0) * float(10 ** (decimals + _GUARD_DECIMALS))).astype(np.int64)
+    return _half_up_div(g, guard), valid
+
+
+def _scale_strings(s: pd.Series, decimals: int):
+    """
+    Mismo criterio que _to_number_locale: '.' de miles, ',' decimal.
+    Se parte en signo / entero / fracción sin pasar por float.
+    """
+    norm = s.str.strip().str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    parts = norm.str.extract(_NUM_RE)
+    valid = parts[1].notna().to_numpy()
+
+    ent  = parts[1].fillna("").replace("", "0")
+    frac = parts[2].fillna("").str.pad(decimals + 1, side="right", fillchar="0").str[: decimals + 1]
+    ent_i  = pd.to_numeric(ent.where(valid, "0")).to_numpy(dtype=np.int64)
+    frac_i = pd.to_numeric(frac.where(valid, "0")).to_numpy(dtype=np.int64)
+
+    scaled = _half_up_div(ent_i * 10 ** (decimals + 1) + frac_i, 10)
+    sign = np.where(parts[0].fillna("").to_numpy() == "-", -1, 1)
+    return scaled * sign, valid
+
+
+def to_scaled(values, decimals: int = CENTS_DECIMALS):
+    """
+    Convierte una serie (números o texto con formato local) a enteros escalados
+    por 10**decimals. Devuelve (np.int64 array, máscara de válidos).
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    n = len(s)
+    out = np.zeros(n, dtype=np.int64)
+    valid = np.zeros(n, dtype=bool)
+    if n == 0:
+        return out, valid
+
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        return _scale_floats(s.to_numpy(dtype=float, na_value=np.nan), decimals)
+
+    is_str = s.map(type).eq(str).to_numpy()
+    if is_str.any():
+        sv, sm = _scale_strings(s[is_str].astype(str), decimals)
+        out[is_str] = sv
+        valid[is_str] = sm
+    rest = ~is_str
+    if rest.any():
+        num = pd.to_numeric(s[rest], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        nv, nm = _scale_floats(num, decimals)
+        out[rest] = nv
+        valid[rest] = nm
+    return out, valid
+
+
+def to_cents(values) -> pd.Series:
+    """Importes -> centavos enteros (Int64 con NA)."""
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    v, m = to_scaled(s, CENTS_DECIMALS)
+    return pd.Series(pd.arrays.IntegerArray(v, ~m), index=s.index)
+
+
+def apply_rate_cents(cents: np.ndarray, rate: np.ndarray) -> np.ndarray:
+    """
+    centavos * TC (escalado por 10**RATE_DECIMALS), redondeo half-up a centavo.
+    La parte entera del TC se multiplica aparte para no desbordar int64.
+    """
+    scale = 10 ** RATE_DECIMALS
+    sign = np.sign(rate)
+    whole = np.abs(rate) // scale
+    frac  = np.abs(rate) % scale
+    return sign * (cents * whole + _half_up_div(cents * frac, scale))
+
+
+def amounts_match(origen, tc, destino, tolerance: float, exact: bool = False):
+    """
+    Compara importes de origen (ajustados por TC) contra destino, todo vectorizado.
+    - Ambos vacíos => coincide; uno solo vacío => no coincide.
+    - exact=True: centavos enteros, TC con redondeo half-up y tolerancia en centavos.
+    Devuelve (máscara de coincidencia, importe de origen ajustado en float).
+    """
+    a = origen if isinstance(origen, pd.Series) else pd.Series(origen)
+    idx = a.index
+    b = pd.Series(destino, index=idx) if not isinstance(destino, pd.Series) else destino
+    t = pd.Series(tc, index=idx) if not isinstance(tc, pd.Series) else tc
+
+    if exact:
+        a_c, a_ok = to_scaled(a, CENTS_DECIMALS)
+        b_c, b_ok = to_scaled(b, CENTS_DECIMALS)
+        r, r_ok = to_scaled(t, RATE_DECIMALS)
+        r = np.where(r_ok, r, 10 ** RATE_DECIMALS)
+        a_adj = apply_rate_cents(a_c, r)
+        tol_c, _ = to_scaled(pd.Series([float(tolerance)]), CENTS_DECIMALS)
+        close = np.abs(a_adj - b_c) <= tol_c[0]
+        match = (~a_ok & ~b_ok) | (a_ok & b_ok & close)
+        shown = np.where(a_ok, a_adj / 100.0, np.nan)
+    else:
+        a_f = a.map(_to_number_locale).to_numpy(dtype=float, na_value=np.nan)
+        b_f = b.map(_to_number_locale).to_numpy(dtype=float, na_value=np.nan)
+        r_f = t.map(_to_number_locale).to_numpy(dtype=float, na_value=np.nan)
+        r_f = np.where(np.isnan(r_f), 1.0, r_f)
+        shown = a_f * r_f
+        with np.errstate(invalid="ignore"):
+            close = np.abs(shown - b_f) <= float(tolerance)
+        match = (np.isnan(shown) & np.isnan(b_f)) | close
+
+    return pd.Series(match, index=idx), pd.Series(shown, index=idx)
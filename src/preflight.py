@@ -0,0 +1,183 @@
+"""
+Chequeo previo (pre-flight) de los archivos de entrada.
+
+Abre ambos libros en modo streaming, lee solo los nombres de hoja y las dos primeras filas,
+y valida el mapeo de config.yaml antes del parseo pesado. Junta todos los problemas
+y los informa de una sola vez.
+"""
+from pathlib import Path
+from typing import List, Optional
+
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+
+from src.compare import COERCERS, extra_columns
+from src.sources import expand_sources
+
+KNOWN_TYPES = tuple(COERCERS)
+
+
+class PreflightError(ValueError):
+    """Uno o más problemas de esquema en los archivos de entrada."""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Problemas en los archivos de entrada:\n" + "\n".join(f"- {p}" for p in problems))
+
+
+def _is_letter(key) -> bool:
+    # Mismo criterio que transform._resolve_col
+    key = str(key).strip()
+    return len(key) <= 3 and key.isalpha()
+
+
+def _letter_to_index(letter: str) -> int:
+    idx = 0
+    for ch in letter.strip().upper():
+        idx = idx * 26 + (ord(ch) - ord('A') + 1)
+    return idx - 1
+
+
+def _read_head(path: str, sheet, label: str, problems: List[str]) -> Optional[list]:
+    """Devuelve las dos primeras filas de la hoja (listas de valores) o None si no se puede abrir."""
+    p = Path(path)
+    if not p.exists():
+        problems.append(f"{label}: no existe el archivo '{path}'.")
+        return None
+    try:
+        wb = load_workbook(p, read_only=True, data_only=True)
+    except PermissionError:
+        problems.append(f"{label}: no se pudo abrir '{p.name}'. Cerrá el archivo si está abierto en Excel.")
+        return None
+    except Exception as e:
+        problems.append(f"{label}: '{p.name}' no es un Excel .xlsx válido ({type(e).__name__}).")
+        return None
+    try:
+        if isinstance(sheet, int):
+            if not 0 <= sheet < len(wb.sheetnames):
+                problems.append(f"{label}: la hoja {sheet} no existe; hojas disponibles: {wb.sheetnames}.")
+                return None
+            ws = wb.worksheets[sheet]
+        elif sheet not in wb.sheetnames:
+            problems.append(f"{label}: no existe la hoja '{sheet}' en '{p.name}'; hojas disponibles: {wb.sheetnames}.")
+            return None
+        else:
+            ws = wb[sheet]
+        head = [list(r) for r in ws.iter_rows(min_row=1, max_row=2, values_only=True)]
+    finally:
+        wb.close()
+    while len(head) < 2:
+        head.append([])
+    return head
+
+
+def _check_afip(header: list, amap: dict, problems: List[str], label: str = "AFIP"):
+    names = [str(v) for v in header if v is not None]
+    width = len(header)
+
+    def check(key, what, required=False):
+        if key is None:
+            if required:
+                problems.append(f"{label}: falta '{what}' en mapping.afip de config.yaml.")
+            return
+        if _is_letter(key):
+            idx = _letter_to_index(str(key))
+            if idx >= width:
+                problems.append(
+                    f"{label}: la columna '{key}' ({what}) está fuera de rango; "
+                    f"la fila de encabezados llega hasta '{get_column_letter(max(width, 1))}'."
+                )
+        elif str(key).strip() not in names:
+            problems.append(f"{label}: no se encontró la columna '{key}' ({what}) en la fila de encabezados.")
+
+    for k in ("tipo", "pv", "num"):
+        check(amap.get(k), k, required=True)
+    for k in ("cuit", "exchange_rate", "fecha"):
+        check(amap.get(k), k)
+    for k, v in (amap.get("importes") or {}).items():
+        check(v, f"importe {k}")
+    for k, v in (amap.get("columnas") or {}).items():
+        check(v, f"columna {k}")
+    pattern = amap.get("build_pattern", "{letter}{pv:04d}{num:08d}")
+    try:
+        pattern.format(letter="A", pv=1, num=1)
+    except (KeyError, ValueError, IndexError) as e:
+        problems.append(f"{label}: build_pattern '{pattern}' inválido ({e}).")
+
+
+def _check_tango(header: list, tmap: dict, columns_cfg: list, problems: List[str], label: str = "Tango"):
+    names = {str(v).strip() for v in header if v is not None}
+    raw   = {v for v in header if v is not None}
+
+    def check(name, what):
+        if name is not None and str(name).strip() not in names:
+            problems.append(f"{label}: no se encontró la columna '{name}' ({what}).")
+
+    if not tmap.get("n_comp_column"):
+        problems.append(f"{label}: falta 'n_comp_column' en mapping.tango de config.yaml.")
+    else:
+        check(tmap["n_comp_column"], "n_comp_column")
+    check(tmap.get("cuit", "IDENTIFTRI"), "cuit")
+    for k, v in (tmap.get("importes") or {}).items():
+        check(v, f"importe {k}")
+
+    # mark_dest busca los encabezados tal cual (sin strip) en la primera fila
+    for name in ["N_COMP", "IDENTIFTRI"] + [c.get("name") for c in columns_cfg]:
+        if name not in raw:
+            problems.append(f"{label}: la hoja de destino no tiene el encabezado '{name}' (necesario para marcar).")
+
+
+def _check_columns_cfg(columns_cfg: list, problems: List[str]):
+    for i, c in enumerate(columns_cfg):
+        if not c.get("name"):
+            problems.append(f"config.yaml: la entrada {i + 1} de 'columns' no tiene 'name'.")
+        kind = c.get("type", "string")
+        if kind not in KNOWN_TYPES:
+            problems.append(f"config.yaml: tipo '{kind}' desconocido en la columna '{c.get('name')}'; opciones: {KNOWN_TYPES}.")
+        try:
+            float(c.get("tolerance", 0.0))
+        except (TypeError, ValueError):
+            problems.append(f"config.yaml: tolerancia inválida en la columna '{c.get('name')}'.")
+
+
+def run_preflight(
+    origen_path,
+    destino_path,
+    origen_sheet,
+    destino_sheet,
+    mapping: dict,
+    columns_cfg: list,
+) -> None:
+    """
+    Valida hojas y encabezados de ambos archivos contra el mapeo; levanta PreflightError con todo lo encontrado.
+    Paths y hojas pueden ser listas o globs (ver src/sources.py): se revisa cada archivo/hoja.
+    """
+    problems: List[str] = []
+
+    if "afip" not in mapping or "tango" not in mapping:
+        problems.append("config.yaml: 'mapping' debe tener las secciones 'afip' y 'tango'.")
+        raise PreflightError(problems)
+
+    _check_columns_cfg(columns_cfg, problems)
+    columnas = mapping["afip"].get("columnas") or {}
+    for c in extra_columns(columns_cfg):
+        if c.get("name") and c["name"] not in columnas:
+            problems.append(f"config.yaml: la columna '{c['name']}' no tiene su columna de AFIP en mapping.afip.columnas.")
+
+    for label, parts in (("AFIP", expand_sources(origen_path, origen_sheet)),
+                         ("Tango", expand_sources(destino_path, destino_sheet))):
+        if not parts:
+            problems.append(f"{label}: no se indicó ningún archivo u hoja.")
+        for path, sheet in parts:
+            where = label if len(parts) == 1 else f"{label} [{Path(path).name} / {sheet}]"
+            head = _read_head(path, sheet, where, problems)
+            if head is None:
+                continue
+            if label == "AFIP":
+                # AFIP: la primera fila es un título; los encabezados reales están en la segunda
+                _check_afip(head[1], mapping["afip"], problems, where)
+            else:
+                _check_tango(head[0], mapping["tango"], columns_cfg, problems, where)
+
+    if problems:
+        raise PreflightError(problems)
@@ -1,12 +1,28 @@
-from openpyxl.styles import PatternFill
-from openpyxl import load_workbook
+from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 import pandas as pd
 
+from src.xlsx_io import save_workbook
+
 YELLOW = PatternFill(start_color="FFF59D", end_color="FFF59D", fill_type="solid")
 
-def write_report(path_output: str, df: pd.DataFrame, keys, columns_cfg):
+# Encabezado con el mismo formato que le daba pandas.to_excel
+_THIN = Side(style="thin")
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"
+
+def _column_values(s: pd.Series) -> list:
+    """Valores listos para openpyxl: NaN/NA/NaT -> celda vacía."""
+    return s.astype(object).where(s.notna(), None).tolist()
+
+def write_report(path_output: str, df: pd.DataFrame, keys, columns_cfg, compression: str = "default"):
     """
     Genera un Excel con las diferencias marcadas en amarillo.
+    Se escribe fila por fila en modo write-only; qué celdas se pintan sale de las
+    máscaras __match__<col> calculadas de antemano, sin volver a leer el archivo.
     """
     cols_order = keys[:]
     for c in columns_cfg:
@@ -14,25 +30,39 @@ def write_report(path_output: str, df: pd.DataFrame, keys, columns_cfg):
         cols_order += [f"{name}_origen", f"{name}_destino"]
     cols_order += ["__row_ok__"]
 
-    df_export = df[cols_order].copy()
-    df_export.to_excel(path_output, sheet_name="Validación", index=False)
-
-    wb = load_workbook(path_output)
-    ws = wb["Validación"]
-    
-    # Mapeo de encabezados
-    header = {ws.cell(row=1, column=j).value: j for j in range(1, ws.max_column + 1)}
-
-    for i in range(2, ws.max_row + 1):
-        for c in columns_cfg:
-            name = c["name"]
-            ok = df.iloc[i - 2][f"__match__{name}"]
-            if not ok:
-                j1 = header.get(f"{name}_origen")
-                j2 = header.get(f"{name}_destino")
-                if j1:
-                    ws.cell(row=i, column=j1).fill = YELLOW
-                if j2:
-                    ws.cell(row=i, column=j2).fill = YELLOW
-
-    wb.save(path_output)
+    # Por columna exportada: lista de valores y máscara de "pintar" (o None si nunca se pinta)
+    values = [_column_values(df[c]) for c in cols_order]
+    highlight = [None] * len(cols_order)
+    for c in columns_cfg:
+        name = c["name"]
+        bad = ~df[f"__match__{name}"].to_numpy(dtype=bool)
+        if bad.any():
+            highlight[cols_order.index(f"{name}_origen")]  = bad
+            highlight[cols_order.index(f"{name}_destino")] = bad
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Validación")
+    header = []
+    for name in cols_order:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font, cell.border, cell.alignment = HEADER_FONT, HEADER_BORDER, HEADER_ALIGNMENT
+        header.append(cell)
+    ws.append(header)
+
+    # Fechas con el formato de número que usaba pandas.to_excel
+    formats = [DATETIME_FORMAT if pd.api.types.is_datetime64_any_dtype(df[c]) else None for c in cols_order]
+    styled = [j for j in range(len(cols_order)) if highlight[j] is not None or formats[j]]
+    for i, row in enumerate(zip(*values)):
+        row = list(row)
+        for j in styled:
+            paint = highlight[j] is not None and highlight[j][i]
+            if paint or (formats[j] and row[j] is not None):
+                cell = WriteOnlyCell(ws, value=row[j])
+                if paint:
+                    cell.fill = YELLOW
+                if formats[j] and row[j] is not None:
+                    cell.number_format = formats[j]
+                row[j] = cell
+        ws.append(row)
+
+    return save_workbook(wb, path_output, compression=compression)
@@ -0,0 +1,104 @@
+"""
+Modelo de datos para el visor de resultados de la GUI.
+
+Trabaja sobre las columnas de compare.build_comparison como arrays de numpy:
+filtrar u ordenar devuelve un array de posiciones (la "vista") y la GUI solo
+formatea las filas que están en pantalla. Los índices (códigos de CUIT/letra/estado
+y el orden por diferencia) se calculan una sola vez al construir el modelo.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.compare import AMOUNT_COLS, STATUS_OK, STATUS_DIFF, STATUS_MISSING, _fmt_cuit_hyphen, _fmt_money_es
+
+ORDER_NATURAL = "Comprobante"
+ORDER_DIFF = "Diferencia (mayor primero)"
+ORDERS = (ORDER_NATURAL, ORDER_DIFF)
+
+COLUMNS = ("Comprobante", "CUIT", "Fecha", "Estado", "Total AFIP", "Total Tango", "Dif. máx.")
+
+
+class ResultsModel:
+    """Índices precalculados sobre el resultado de la comparación."""
+
+    def __init__(self, comparison: pd.DataFrame, messages: Optional[Sequence[str]] = None):
+        n = len(comparison)
+        self.messages = messages
+        self.ncomp = comparison["N_COMP"].astype(str).to_numpy(dtype=object)
+        self.estado = comparison["ESTADO"].to_numpy(dtype=object)
+
+        cuit = comparison["IDENTIFTRI"].astype(str).str.strip()
+        self.cuit_codes, self.cuits = pd.factorize(cuit, sort=True)
+        self.cuits = np.asarray(self.cuits, dtype=object)
+        self.letra_codes, self.letras = pd.factorize(comparison["N_COMP"].astype(str).str[:1], sort=True)
+        self.letras = [str(x) for x in self.letras]
+        self.estado_codes = {e: self.estado == e for e in (STATUS_OK, STATUS_DIFF, STATUS_MISSING)}
+
+        if "FECHA" in comparison.columns:
+            fechas = pd.to_datetime(comparison["FECHA"], errors="coerce").to_numpy(dtype="datetime64[D]")
+            self.fecha = np.where(np.isnat(fechas), "", fechas.astype(str)).astype(object)
+        else:
+            self.fecha = np.full(n, "", dtype=object)
+        self.total_origen = comparison["IMP_TOTAL_origen"].to_numpy(dtype=float, na_value=np.nan)
+        self.total_destino = comparison["IMP_TOTAL_destino"].to_numpy(dtype=float, na_value=np.nan)
+
+        # Diferencia = mayor |origen - destino| entre las columnas que no coinciden;
+        # si la factura falta en Tango, cuenta el importe de origen completo
+        diff = np.zeros(n)
+        for name in AMOUNT_COLS:
+            a = comparison[f"{name}_origen"].to_numpy(dtype=float, na_value=np.nan)
+            b = comparison[f"{name}_destino"].to_numpy(dtype=float, na_value=np.nan)
+            d = np.abs(np.where(np.isnan(b), a, a - b))
+            bad = ~comparison[f"__match__{name}"].to_numpy(dtype=bool)
+            diff = np.fmax(diff, np.where(bad, np.nan_to_num(d), 0.0))
+        self.diff = diff
+        self.order_diff = np.argsort(-diff, kind="stable")
+        self.all_rows = np.arange(n)
+
+    def __len__(self):
+        return len(self.ncomp)
+
+    def counts(self) -> dict:
+        return {e: int(m.sum()) for e, m in self.estado_codes.items()}
+
+    def view(
+        self,
+        estado: Optional[str] = None,
+        cuit: str = "",
+        letra: Optional[str] = None,
+        order: str = ORDER_NATURAL,
+    ) -> np.ndarray:
+        """
+        Posiciones de las filas que pasan los filtros, en el orden pedido.
+        cuit: parte del CUIT (se ignoran guiones); se busca sobre los CUIT únicos, no fila por fila.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if estado in self.estado_codes:
+            mask &= self.estado_codes[estado]
+        digits = "".join(ch for ch in str(cuit or "") if ch.isdigit())
+        if digits:
+            hits = np.flatnonzero([digits in c for c in self.cuits])
+            mask &= np.isin(self.cuit_codes, hits)
+        if letra in self.letras:
+            mask &= self.letra_codes == self.letras.index(letra)
+
+        if order == ORDER_DIFF:
+            return self.order_diff[mask[self.order_diff]]
+        return self.all_rows[mask]
+
+    def row(self, i: int) -> tuple:
+        """Valores ya formateados de la fila i (posición en el resultado)."""
+        return (
+            self.ncomp[i],
+            _fmt_cuit_hyphen(self.cuits[self.cuit_codes[i]]),
+            self.fecha[i],
+            self.estado[i],
+            _fmt_money_es(self.total_origen[i]),
+            _fmt_money_es(self.total_destino[i]),
+            _fmt_money_es(self.diff[i]) if self.diff[i] else "",
+        )
+
+    def message(self, i: int) -> str:
+        return self.messages[i] if self.messages is not None and i < len(self.messages) else ""
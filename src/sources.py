@@ -0,0 +1,134 @@
+"""
+Entradas de varios archivos/hojas.
+
+Un origen o destino puede ser un path, un glob ("data/afip_*.xlsx") o una lista de ellos;
+la hoja puede ser un nombre, un índice, una lista o "*" (todas las hojas del libro).
+Cada combinación (archivo, hoja) es una "parte": se parsean en paralelo y se concatenan
+en un solo frame normalizado con ARCHIVO, HOJA y FILA (fila de Excel) de cada registro,
+para poder escribir las marcas de vuelta en el archivo y la hoja de donde salió.
+"""
+import os
+import glob
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+ALL_SHEETS = "*"
+PROVENANCE = ["ARCHIVO", "HOJA", "FILA"]
+
+
+def _as_list(spec) -> list:
+    if spec is None:
+        return []
+    if isinstance(spec, (list, tuple)):
+        return list(spec)
+    return [spec]
+
+
+def expand_paths(spec) -> List[str]:
+    """Paths y globs -> lista de archivos (sin duplicados, en el orden dado; cada glob ordenado)."""
+    files = []
+    for item in _as_list(spec):
+        item = str(item)
+        if glob.has_magic(item):
+            # Si el glob no encuentra nada se deja tal cual: el pre-flight/lectura informa que no existe
+            files += sorted(glob.glob(item)) or [item]
+        else:
+            files.append(item)
+    return list(dict.fromkeys(files))
+
+
+def _sheet_names(path: str) -> list:
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def expand_sources(paths, sheets) -> List[Tuple[str, object]]:
+    """(archivo, hoja) para cada archivo x cada hoja pedida; "*" expande a todas las hojas del archivo."""
+    sheets = _as_list(sheets)
+    parts = []
+    for path in expand_paths(paths):
+        for sheet in sheets:
+            if sheet == ALL_SHEETS:
+                try:
+                    parts += [(path, s) for s in _sheet_names(path)]
+                    continue
+                except Exception:
+                    pass   # archivo inexistente o inválido: lo informa el pre-flight o la lectura
+            parts.append((path, sheet))
+    return list(dict.fromkeys(parts))
+
+
+def _load_part(loader: Callable, path: str, sheet, mapping: dict) -> pd.DataFrame:
+    df = loader(path, sheet, mapping)
+    df.insert(0, "ARCHIVO", str(path))
+    df.insert(1, "HOJA", sheet)
+    return df
+
+
+def load_parts(loader: Callable, parts: List[Tuple[str, object]], mapping: dict, parallel: bool = True) -> pd.DataFrame:
+    """
+    Aplica `loader(path, sheet, mapping)` a cada parte (en procesos separados si hay más de una)
+    y concatena los resultados en el orden de `parts`.
+    """
+    if not parts:
+        raise ValueError("No se indicó ningún archivo de entrada.")
+    if parallel and len(parts) > 1:
+        workers = min(len(parts), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_load_part, loader, path, sheet, mapping) for path, sheet in parts]
+            frames = [f.result() for f in futures]
+    else:
+        frames = [_load_part(loader, path, sheet, mapping) for path, sheet in parts]
+    return pd.concat(frames, ignore_index=True)
+
+
+def collapse_keys(df: pd.DataFrame, keys: list, sum_cols: list) -> pd.DataFrame:
+    """
+    Una fila por clave: si la misma factura aparece en varias partes se suman los importes
+    (igual que las filas partidas dentro de una hoja); la procedencia queda la de la primera.
+    """
+    if not df.duplicated(keys).any():
+        return df
+    g = df.groupby(keys, dropna=False, sort=False)
+    out = g[list(sum_cols)].sum(min_count=1)
+    first = [c for c in df.columns if c not in keys and c not in sum_cols]
+    if first:
+        out = g[first].first().join(out)
+    return out.reset_index()[list(df.columns)]
+
+
+def _safe(label: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in label)
+
+
+def part_labels(parts: List[Tuple[str, object]]) -> List[str]:
+    """
+    Sufijo único para el nombre de salida de cada parte: '' con una sola parte; si no, nombre del archivo
+    (con su carpeta si hay otro archivo con el mismo nombre, y la hoja si el archivo aporta varias).
+    Si aun así se repite, se numera: dos salidas nunca comparten ruta.
+    """
+    if len(parts) <= 1:
+        return [""] * len(parts)
+    stems = {}
+    for path in dict.fromkeys(p for p, _ in parts):
+        stems.setdefault(Path(path).stem, []).append(path)
+    labels = []
+    for path, sheet in parts:
+        p = Path(path)
+        label = p.stem if len(stems[p.stem]) == 1 else f"{p.parent.name}_{p.stem}"
+        if sum(1 for q, _ in parts if q == path) > 1:
+            label += f"_{sheet}"
+        labels.append("_" + _safe(label))
+    for label in set(labels):
+        idx = [i for i, x in enumerate(labels) if x == label]
+        if len(idx) > 1:
+            for n, i in enumerate(idx, start=1):
+                labels[i] = f"{label}_{n}"
+    return labels
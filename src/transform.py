@@ -105,6 +105,13 @@ def load_afip_with_map(path: str, sheet: str, mp: dict) -> pd.DataFrame:
     c_cuit = _resolve_col(df, amap.get("cuit"))
     ident = df[c_cuit].map(_normalize_cuit) if c_cuit in df.columns else pd.NA
     
+    # Fecha de emisión (A), opcional: define el período en el historial.
+    # Mismo parser que la comparación de fechas (dd/mm/aaaa, ISO y celdas de fecha); import local:
+    # compare -> money -> transform
+    from src.compare import _coerce_date
+    c_fecha = _resolve_col(df, amap.get("fecha"))
+    fecha = _coerce_date(df[c_fecha]) if c_fecha in df.columns else pd.NaT
+
     # Tipo de cambio (I)
     c_tc = _resolve_col(df, amap.get("exchange_rate"))
     if c_tc and c_tc in df.columns:
@@ -119,13 +126,20 @@ def load_afip_with_map(path: str, sheet: str, mp: dict) -> pd.DataFrame:
         return df[ck].map(_to_number_locale) if ck in df.columns else pd.NA
 
     out = pd.DataFrame()
+    out["FILA"]       = df.index + 3   # fila de Excel: título en la 1, encabezados en la 2
     out["N_COMP"]     = df["N_COMP"]
     out["IDENTIFTRI"] = ident
+    out["FECHA"]      = fecha
     out["TC"]         = tc
     out["IMP_EXENTO"] = take_num("exento")
     out["IMP_NETO"]   = take_num("neto")
     out["IMP_IVA"]    = take_num("iva")
     out["IMP_TOTAL"]  = take_num("total")
+
+    # Columnas extra a comparar (ver columns en config.yaml): encabezado de Tango -> columna de AFIP
+    for name, key in (amap.get("columnas") or {}).items():
+        ck = _resolve_col(df, key)
+        out[name] = df[ck] if ck in df.columns else pd.NA
     return out
 
 def load_tango_with_map(path: str, sheet: str, mp: dict) -> pd.DataFrame:
@@ -139,6 +153,7 @@ def load_tango_with_map(path: str, sheet: str, mp: dict) -> pd.DataFrame:
     mi     = tmap.get("importes", {})
 
     out = pd.DataFrame()
+    out["FILA"]       = df.index + 2   # fila de Excel (encabezados en la 1)
     out["N_COMP"]     = df["N_COMP"]
     out["IDENTIFTRI"] = df[c_cuit].map(_normalize_cuit) if c_cuit in df.columns else pd.NA
     def take_num(colname):
@@ -148,13 +163,16 @@ def load_tango_with_map(path: str, sheet: str, mp: dict) -> pd.DataFrame:
     out["IMP_NETO"]   = take_num(mi.get("neto",   "IMP_NETO"))
     out["IMP_IVA"]    = take_num(mi.get("iva",    "IMP_IVA"))
     out["IMP_TOTAL"]  = take_num(mi.get("total",  "IMP_TOTAL"))
+    extras = list(mp["afip"].get("columnas") or {})
+    for name in extras:
+        out[name] = df[name] if name in df.columns else pd.NA
 
     # Agrupar por N_COMP y CUIT, ya que una misma factura puede estar dividida en varias filas
-    grouped = (
-        out.groupby(["N_COMP", "IDENTIFTRI"], dropna=False)[
-            ["IMP_EXENTO", "IMP_NETO", "IMP_IVA", "IMP_TOTAL"]
-        ]
-        .sum(min_count=1)
-        .reset_index()
-    )
-    return grouped
+    # (FILA y las columnas extra quedan con la primera fila de la factura)
+    amounts = ["IMP_EXENTO", "IMP_NETO", "IMP_IVA", "IMP_TOTAL"]
+    g = out.groupby(["N_COMP", "IDENTIFTRI"], dropna=False)
+    grouped = g[amounts].sum(min_count=1)
+    grouped.insert(0, "FILA", g["FILA"].min())
+    if extras:
+        grouped = grouped.join(g[extras].first())
+    return grouped.reset_index()
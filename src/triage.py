@@ -0,0 +1,111 @@
+"""
+Triage por proveedor: sumas por CUIT y letra de AFIP (ajustado por TC) contra Tango.
+
+Sirve para ver rápido qué proveedores no concilian, sin comparar ni marcar factura por factura.
+"""
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.compare import AMOUNT_COLS, STATUS_OK, STATUS_DIFF, _fmt_cuit_hyphen, _fmt_money_es
+from src.money import to_scaled, apply_rate_cents, CENTS_DECIMALS, RATE_DECIMALS
+from src.transform import _to_number_locale
+from src.origen_validated import GREEN_FILL, RED_FILL
+from src.xlsx_io import save_workbook, frame_to_workbook
+
+KEYS = ["IDENTIFTRI", "LETRA"]
+
+
+def _with_keys(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=df.index)
+    out["IDENTIFTRI"] = df["IDENTIFTRI"].astype(str).str.strip()
+    out["LETRA"] = df["N_COMP"].astype(str).str.strip().str.upper().str[:1]
+    return out
+
+
+def _amounts(values: pd.Series, tc, exact: bool) -> np.ndarray:
+    """Importes (ajustados por TC si se pasa) en la unidad de suma: centavos int64 si exact, float si no."""
+    if exact:
+        v, ok = to_scaled(values, CENTS_DECIMALS)
+        if tc is not None:
+            r, r_ok = to_scaled(tc, RATE_DECIMALS)
+            v = apply_rate_cents(v, np.where(r_ok, r, 10 ** RATE_DECIMALS))
+        return np.where(ok, v, 0)
+    v = values.map(_to_number_locale).to_numpy(dtype=float, na_value=np.nan)
+    if tc is not None:
+        r = tc.map(_to_number_locale).to_numpy(dtype=float, na_value=np.nan)
+        v = v * np.where(np.isnan(r), 1.0, r)
+    return np.nan_to_num(v)
+
+
+def supplier_summary(
+    origen_df: pd.DataFrame,
+    destino_df: pd.DataFrame,
+    tolerances: Dict[str, float],
+    exact: bool = False,
+) -> pd.DataFrame:
+    """
+    Una fila por (CUIT, letra) con cantidad de facturas, sumas AFIP/Tango por importe y diferencia.
+    Tolerancia del grupo = tolerancia por factura x cantidad de facturas del lado más grande.
+    Para Factura C solo cuenta el TOTAL (igual que en la comparación por factura).
+    """
+    tc = origen_df["TC"] if "TC" in origen_df.columns else None
+
+    a = _with_keys(origen_df)
+    b = _with_keys(destino_df)
+    for name in AMOUNT_COLS:
+        a[name] = _amounts(origen_df[name], tc, exact)
+        b[name] = _amounts(destino_df[name], None, exact)
+
+    ga = a.groupby(KEYS, dropna=False).agg(FACT_AFIP=("LETRA", "size"), **{f"{n}_AFIP": (n, "sum") for n in AMOUNT_COLS})
+    gb = b.groupby(KEYS, dropna=False).agg(FACT_TANGO=("LETRA", "size"), **{f"{n}_TANGO": (n, "sum") for n in AMOUNT_COLS})
+    res = ga.join(gb, how="outer").fillna(0).reset_index()
+    res["FACT_AFIP"] = res["FACT_AFIP"].astype(int)
+    res["FACT_TANGO"] = res["FACT_TANGO"].astype(int)
+
+    n_max = np.maximum(res["FACT_AFIP"], res["FACT_TANGO"]).to_numpy()
+    is_c = res["LETRA"].eq("C").to_numpy()
+    ok = np.ones(len(res), dtype=bool)
+    for name in AMOUNT_COLS:
+        dif = (res[f"{name}_AFIP"] - res[f"{name}_TANGO"]).to_numpy()
+        tol = float(tolerances.get(name, 0.0))
+        if exact:
+            tol_c, _ = to_scaled(pd.Series([tol]), CENTS_DECIMALS)
+            col_ok = np.abs(dif) <= tol_c[0] * n_max
+            for side in ("AFIP", "TANGO"):
+                res[f"{name}_{side}"] = res[f"{name}_{side}"] / 100.0
+            dif = dif / 100.0
+        else:
+            col_ok = np.abs(dif) <= tol * n_max + 1e-9
+        res[f"DIF_{name}"] = dif
+        ok &= col_ok | (is_c & (name != "IMP_TOTAL"))
+
+    res["ESTADO"] = np.where(ok, STATUS_OK, STATUS_DIFF)
+    order = KEYS + ["FACT_AFIP", "FACT_TANGO"]
+    for name in AMOUNT_COLS:
+        order += [f"{name}_AFIP", f"{name}_TANGO", f"DIF_{name}"]
+    order += ["ESTADO"]
+    return res[order].sort_values(["ESTADO", "IDENTIFTRI", "LETRA"], ascending=[False, True, True], ignore_index=True)
+
+
+def summary_messages(summary: pd.DataFrame) -> List[str]:
+    msgs = []
+    for row in summary[summary["ESTADO"] == STATUS_DIFF].itertuples(index=False):
+        cuit = _fmt_cuit_hyphen(row.IDENTIFTRI)
+        msgs.append(
+            f"❌ Proveedor {cuit} (letra {row.LETRA}): AFIP {row.FACT_AFIP} fact. / Tango {row.FACT_TANGO} fact. "
+            f"- Total AFIP {_fmt_money_es(row.IMP_TOTAL_AFIP)} vs Tango {_fmt_money_es(row.IMP_TOTAL_TANGO)}"
+        )
+    return msgs
+
+
+def write_summary(summary: pd.DataFrame, out_path: str, compression: str = "default", atomic: bool = True):
+    """Hoja 'Proveedores' con una fila por CUIT/letra, verde si concilia y roja si no."""
+    wb = frame_to_workbook(summary, "Proveedores", tmp_dir=Path(out_path).parent)
+    ws = wb["Proveedores"]
+    j_estado = summary.columns.get_loc("ESTADO") + 1
+    for i, estado in enumerate(summary["ESTADO"], start=2):
+        ws.cell(row=i, column=j_estado).fill = GREEN_FILL if estado == STATUS_OK else RED_FILL
+    return save_workbook(wb, out_path, compression=compression, atomic=atomic)
@@ -0,0 +1,304 @@
+"""
+Watcher de carpeta: valida automáticamente los pares AFIP/Tango que llegan a un inbox.
+
+Cómo se arma un par:
+  - Por nombre: <trabajo>_afip.xlsx + <trabajo>_tango.xlsx
+    (también se aceptan los sufijos _origen / _destino).
+  - Por manifiesto: <trabajo>.json con {"origen": "...", "destino": "...",
+    "origen_sheet": opcional, "destino_sheet": opcional}. Tiene prioridad sobre el nombre.
+    origen/destino pueden ser un archivo, un glob o una lista (relativos al inbox; ver src/sources.py).
+    Un manifiesto que sigue inválido cuando ya no cambia se mueve a errores/.
+
+Los resultados y summary.json de cada corrida quedan en <outbox>/<trabajo>_<fecha>_<token>/.
+
+Solo usa polling (sin APIs de notificación del sistema operativo):
+    python -m src.watcher --inbox entrada --outbox salida
+"""
+import sys
+import json
+import uuid
+import time
+import shutil
+import argparse
+import threading
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+from src.main import run_validation, _load_config
+from src.sources import expand_paths
+from src.xlsx_io import _unique_alt
+
+ORIGEN_SUFFIXES  = ("_afip", "_origen")
+DESTINO_SUFFIXES = ("_tango", "_destino")
+EXCEL_EXTS = (".xlsx", ".xlsm")
+
+PROCESSED_DIR = "procesados"
+FAILED_DIR    = "errores"
+
+
+def _split_role(path: Path) -> Tuple[Optional[str], Optional[str]]:
+    """'<trabajo>_afip.xlsx' -> ('<trabajo>', 'origen'); si no matchea, (None, None)."""
+    stem = path.stem
+    low = stem.lower()
+    for suf in ORIGEN_SUFFIXES:
+        if low.endswith(suf):
+            return stem[: -len(suf)], "origen"
+    for suf in DESTINO_SUFFIXES:
+        if low.endswith(suf):
+            return stem[: -len(suf)], "destino"
+    return None, None
+
+
+def _job_files(job: dict) -> list:
+    """Archivos de Excel de un trabajo (los globs del manifiesto, expandidos)."""
+    specs = [str(p) for role in ("origen", "destino") for p in job.get(role, [])]
+    return [Path(f) for f in expand_paths(specs)]
+
+
+class InboxWatcher:
+    """
+    Recorre el inbox cada `poll_interval` segundos y encola los pares listos
+    en un pool acotado de `workers` hilos (como máximo `max_pending` trabajos
+    en vuelo; el resto espera a la próxima pasada).
+    Un archivo está listo cuando su tamaño y fecha no cambiaron durante `settle_seconds`.
+    """
+
+    def __init__(
+        self,
+        inbox: str,
+        outbox: str,
+        cfg: Optional[dict] = None,
+        workers: int = 2,
+        max_pending: int = 4,
+        settle_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+    ):
+        self.inbox = Path(inbox)
+        self.outbox = Path(outbox)
+        self.inbox.mkdir(parents=True, exist_ok=True)
+        self.outbox.mkdir(parents=True, exist_ok=True)
+
+        # Config cargada una sola vez: queda "caliente" entre trabajos
+        self.cfg = cfg if cfg is not None else _load_config()
+        self.settle_seconds = float(settle_seconds)
+        self.poll_interval = float(poll_interval)
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validador")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._in_flight = set()      # nombres de trabajo encolados o corriendo
+        self._futures = []
+        self._seen: Dict[Path, Tuple[int, int, float]] = {}   # path -> (size, mtime_ns, desde cuándo estable)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # ---------- detección ----------
+    def _is_settled(self, path: Path, now: float) -> bool:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._seen.pop(path, None)
+            return False
+        sig = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            prev = self._seen.get(path)
+            if prev is None or prev[:2] != sig:
+                self._seen[path] = (sig[0], sig[1], now)
+                return False
+        return st.st_size > 0 and (now - prev[2]) >= self.settle_seconds
+
+    def _read_manifest(self, mf: Path) -> dict:
+        """Trabajo descrito por un manifiesto; ValueError si no es JSON o no tiene la forma esperada."""
+        data = json.loads(mf.read_text(encoding="utf-8"))
+        if not isinstance(data, dict):
+            raise ValueError("se esperaba un objeto JSON")
+        job = {
+            "origen_sheet":  data.get("origen_sheet"),
+            "destino_sheet": data.get("destino_sheet"),
+            "manifest": mf,
+        }
+        for role in ("origen", "destino"):
+            spec = data.get(role)
+            items = spec if isinstance(spec, list) else [spec]
+            if not items or not all(isinstance(x, str) and x for x in items):
+                raise ValueError(f"'{role}' tiene que ser un archivo o una lista de archivos")
+            job[role] = [self.inbox / x for x in items]
+        return job
+
+    def _reject_manifest(self, mf: Path, reason: Exception):
+        print(f"[watcher] Manifiesto inválido {mf.name}: {reason}. Se mueve a {FAILED_DIR}/.")
+        self._archive_inputs({"manifest": mf}, FAILED_DIR)
+
+    def _find_pairs(self, now: float) -> Dict[str, dict]:
+        """Devuelve trabajo -> {'origen': [Path], 'destino': [Path], 'manifest': Path|None, ...hojas}."""
+        jobs: Dict[str, dict] = {}
+        claimed = set()
+
+        for mf in sorted(self.inbox.glob("*.json")):
+            try:
+                job = self._read_manifest(mf)
+            except (OSError, ValueError) as e:
+                # A medio escribir: se reintenta en la próxima pasada; si ya no cambia, es inválido
+                if self._is_settled(mf, now):
+                    self._reject_manifest(mf, e)
+                continue
+            jobs[mf.stem] = job
+            claimed.update(_job_files(job))
+
+        partial: Dict[str, dict] = {}
+        for f in sorted(self.inbox.iterdir()):
+            if not f.is_file() or f.suffix.lower() not in EXCEL_EXTS or f.name.startswith("~$") or f in claimed:
+                continue
+            name, role = _split_role(f)
+            if name:
+                partial.setdefault(name, {})[role] = f
+        for name, roles in partial.items():
+            if "origen" in roles and "destino" in roles and name not in jobs:
+                jobs[name] = {"origen": [roles["origen"]], "destino": [roles["destino"]], "manifest": None}
+        return jobs
+
+    def poll_once(self) -> list:
+        """Una pasada sobre el inbox. Devuelve los nombres de trabajo encolados en esta pasada."""
+        now = time.monotonic()
+        queued = []
+        for name, job in self._find_pairs(now).items():
+            with self._lock:
+                if name in self._in_flight:
+                    continue
+            files = _job_files(job) + ([job["manifest"]] if job["manifest"] else [])
+            ready = [self._is_settled(p, now) for p in files]
+            if not all(ready):
+                continue
+            if not self._slots.acquire(blocking=False):
+                break    # pool lleno: se reintenta en la próxima pasada
+            with self._lock:
+                self._in_flight.add(name)
+            self._futures.append(self._pool.submit(self._process, name, job))
+            queued.append(name)
+        return queued
+
+    # ---------- procesamiento ----------
+    def _process(self, name: str, job: dict) -> dict:
+        started = datetime.now()
+        # Una carpeta por corrida: reenviar un trabajo con el mismo nombre no pisa resultados anteriores
+        run_id = f"{started:%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
+        job_dir = self.outbox / f"{name}_{run_id}"
+        summary = {
+            "trabajo": name,
+            "corrida": run_id,
+            "origen":  [str(p) for p in job["origen"]],
+            "destino": [str(p) for p in job["destino"]],
+            "inicio":  started.isoformat(timespec="seconds"),
+        }
+        try:
+            result = run_validation(
+                origen_path=[str(p) for p in job["origen"]],
+                destino_path=[str(p) for p in job["destino"]],
+                origen_sheet=job.get("origen_sheet"),
+                destino_sheet=job.get("destino_sheet"),
+                output_dir=str(job_dir),
+                cfg=self.cfg,
+            )
+            msgs = result["mensajes"]
+            summary.update({
+                "estado": "ok",
+                "destino_validado": result["destino_validado"],
+                "origen_validado":  result["origen_validado"],
+                "destinos_validados": result["destinos_validados"],
+                "origenes_validados": result["origenes_validados"],
+                "faltantes":    result["faltantes"],
+                "coinciden":    sum(m.startswith("✅") for m in msgs),
+                "no_coinciden": sum(m.startswith("❌") for m in msgs),
+                "mensajes": msgs,
+            })
+            archive = PROCESSED_DIR
+        except Exception as e:
+            traceback.print_exc()
+            summary.update({"estado": "error", "error": f"{type(e).__name__}: {e}"})
+            archive = FAILED_DIR
+        finally:
+            summary["fin"] = datetime.now().isoformat(timespec="seconds")
+            summary["segundos"] = round((datetime.now() - started).total_seconds(), 3)
+
+        try:
+            job_dir.mkdir(parents=True, exist_ok=True)
+            (job_dir / "summary.json").write_text(
+                json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            self._archive_inputs(job, archive)
+        finally:
+            with self._lock:
+                self._in_flight.discard(name)
+            self._slots.release()
+        print(f"[watcher] {name}: {summary['estado']} ({summary['segundos']} s)")
+        return summary
+
+    def _archive_inputs(self, job: dict, sub: str):
+        """Saca los archivos del inbox para que no se vuelvan a procesar."""
+        dest = self.inbox / sub
+        dest.mkdir(exist_ok=True)
+        files = _job_files(job) + ([job["manifest"]] if job.get("manifest") else [])
+        for p in files:
+            if p.exists():
+                target = dest / p.name
+                if target.exists():
+                    target = _unique_alt(target)   # timestamp + token: dos entregas en el mismo segundo no se pisan
+                shutil.move(str(p), str(target))
+                with self._lock:
+                    self._seen.pop(p, None)
+
+    # ---------- ciclo de vida ----------
+    def drain(self, timeout: Optional[float] = None) -> list:
+        """Espera a que terminen los trabajos encolados y devuelve sus resúmenes."""
+        futures, self._futures = self._futures, []
+        return [f.result(timeout=timeout) for f in futures]
+
+    def run_forever(self):
+        print(f"[watcher] Vigilando {self.inbox} -> {self.outbox} (Ctrl+C para salir)")
+        try:
+            while not self._stop.is_set():
+                self.poll_once()
+                self._futures = [f for f in self._futures if not f.done()]
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Valida automáticamente los pares AFIP/Tango que llegan a una carpeta.")
+    ap.add_argument("--inbox", required=True, help="Carpeta a vigilar")
+    ap.add_argument("--outbox", required=True, help="Carpeta donde se dejan resultados y summary.json")
+    ap.add_argument("--config", default=None, help="Ruta a config.yaml (opcional)")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--max-pending", type=int, default=4)
+    ap.add_argument("--settle", type=float, default=2.0, help="Segundos sin cambios para considerar un archivo completo")
+    ap.add_argument("--interval", type=float, default=1.0, help="Segundos entre pasadas")
+    args = ap.parse_args(argv)
+
+    watcher = InboxWatcher(
+        inbox=args.inbox,
+        outbox=args.outbox,
+        cfg=_load_config(args.config),
+        workers=args.workers,
+        max_pending=args.max_pending,
+        settle_seconds=args.settle,
+        poll_interval=args.interval,
+    )
+    watcher.run_forever()
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import os
+import uuid
+import datetime
+import tempfile
+from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from openpyxl import load_workbook
+from openpyxl.writer.excel import ExcelWriter
+
+# Nivel de compresión zip del .xlsx: "fast" escribe más rápido, "small" ocupa menos
+COMPRESSION_LEVELS = {"fast": 1, "default": 6, "small": 9}
+
+
+def _compresslevel(compression) -> int:
+    if compression is None:
+        return COMPRESSION_LEVELS["default"]
+    if isinstance(compression, int):
+        return compression
+    key = str(compression).strip().lower()
+    if key not in COMPRESSION_LEVELS:
+        raise ValueError(f"Compresión desconocida '{compression}'. Opciones: {list(COMPRESSION_LEVELS)}")
+    return COMPRESSION_LEVELS[key]
+
+
+def _unique_alt(path: Path) -> Path:
+    """Nombre alternativo único (timestamp + token) para cuando el destino está bloqueado."""
+    ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return path.with_name(f"{path.stem}_{ts}_{uuid.uuid4().hex[:8]}{path.suffix}")
+
+
+def _read_umask() -> int:
+    # os.umask solo se puede leer cambiándolo: se hace una vez al importar, antes de que haya hilos
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _read_umask()
+
+
+def _default_mode() -> int:
+    """Permisos que tendría un archivo recién creado (mkstemp crea con 0600)."""
+    return 0o666 & ~_UMASK
+
+
+def _write(workbook, target, level: int):
+    archive = ZipFile(target, "w", ZIP_DEFLATED, allowZip64=True, compresslevel=level)
+    workbook.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+    ExcelWriter(workbook, archive).save()
+
+
+def write_atomically(path, write, atomic: bool = True) -> Path:
+    """
+    Llama a write(destino) para producir el archivo en `path`.
+    - atomic=True: escribe a un temporal en la misma carpeta y lo renombra (os.replace),
+      así nunca queda un .xlsx a medio escribir y dos corridas no se pisan el temporal.
+    - Si el destino está abierto (PermissionError), se guarda con un nombre único al lado.
+    Devuelve la ruta efectivamente escrita.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if not atomic:
+        try:
+            write(path)
+            return path
+        except PermissionError:
+            alt = _unique_alt(path)
+            write(alt)
+            return alt
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.stem}_", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        write(tmp)
+        os.chmod(tmp, _default_mode())
+        try:
+            os.replace(tmp, path)
+            return path
+        except PermissionError:
+            alt = _unique_alt(path)
+            os.replace(tmp, alt)
+            return alt
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def save_workbook(workbook, path, compression="default", atomic: bool = True) -> Path:
+    """Guarda un workbook de openpyxl con el nivel de compresión pedido (ver write_atomically)."""
+    level = _compresslevel(compression)
+    return write_atomically(path, lambda target: _write(workbook, target, level), atomic=atomic)
+
+
+def copy_package(src_path, path, replace: dict, compression="default", atomic: bool = True) -> Path:
+    """
+    Copia un .xlsx parte por parte, reemplazando solo las partes de `replace`
+    (nombre interno -> bytes). El resto del paquete pasa sin tocar su contenido.
+    """
+    level = _compresslevel(compression)
+
+    def _copy(target):
+        with ZipFile(src_path) as zin, ZipFile(target, "w", ZIP_DEFLATED, allowZip64=True) as zout:
+            for info in zin.infolist():
+                data = replace[info.filename] if info.filename in replace else zin.read(info)
+                zout.writestr(info, data, compress_type=ZIP_DEFLATED, compresslevel=level)
+
+    return write_atomically(path, _copy, atomic=atomic)
+
+
+def frame_to_workbook(df, sheet_name: str, tmp_dir=None):
+    """DataFrame -> workbook de openpyxl (vía un .xlsx intermedio que se borra enseguida)."""
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=tmp_dir)
+    os.close(fd)
+    try:
+        df.to_excel(tmp_path, sheet_name=sheet_name, index=False)
+        return load_workbook(tmp_path)
+    finally:
+        os.remove(tmp_path)
@@ -0,0 +1,223 @@
+"""
+Marcado dirigido de celdas en un .xlsx sin cargar el libro completo.
+
+Solo se reescriben dos partes del paquete:
+  - la hoja destino: se cambia el atributo s= (estilo) de las celdas marcadas,
+  - xl/styles.xml: se agregan el relleno, las fuentes y los xf necesarios.
+El resto (otras hojas, nombres definidos, imágenes, etc.) se copia tal cual.
+Si el paquete tiene una forma que no sabemos editar, se levanta UnsupportedPackage
+y quien llama vuelve al camino con openpyxl.
+"""
+import re
+import posixpath
+from zipfile import ZipFile, BadZipFile
+from xml.etree import ElementTree as ET
+
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+from src.xlsx_io import copy_package
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL  = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG  = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_CELL_RE = re.compile(r"<c\b([^>]*?)(/?)>")
+_ROW_RE  = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_REF_RE  = re.compile(r'\br="([A-Z]+)(\d+)"')
+_S_RE    = re.compile(r'\bs="(\d+)"')
+
+
+class UnsupportedPackage(Exception):
+    """El .xlsx no tiene la estructura que el marcado dirigido sabe editar."""
+
+
+def _block(xml: str, tag: str):
+    """(inicio, fin, tag de apertura, contenido) del bloque <tag ...>...</tag>."""
+    m = re.search(rf"<{tag}\b([^>]*)>(.*?)</{tag}>", xml, re.S)
+    if not m:
+        raise UnsupportedPackage(f"styles.xml sin bloque <{tag}>")
+    return m.start(), m.end(), f"<{tag}{m.group(1)}>", m.group(2)
+
+
+def _items(content: str, tag: str) -> list:
+    return re.findall(rf"<{tag}\b[^>]*?/>|<{tag}\b[^>]*?>.*?</{tag}>", content, re.S)
+
+
+def _set_attr(element: str, name: str, value) -> str:
+    """Fija un atributo en el tag de apertura de `element`."""
+    end = element.index(">")
+    start_tag, rest = element[: end + 1], element[end + 1:]
+    if re.search(rf'\b{name}="[^"]*"', start_tag):
+        start_tag = re.sub(rf'\b{name}="[^"]*"', f'{name}="{value}"', start_tag, count=1)
+    else:
+        cut = end - 1 if start_tag.endswith("/>") else end
+        start_tag = f'{start_tag[:cut]} {name}="{value}"{start_tag[cut:]}'
+    return start_tag + rest
+
+
+def _append(xml: str, tag: str, item: str, new_items: list) -> str:
+    """Agrega elementos <item> al final del bloque <tag> y actualiza count=."""
+    if not new_items:
+        return xml
+    start, end, open_tag, content = _block(xml, tag)
+    total = len(_items(content, item)) + len(new_items)
+    open_tag = _set_attr(open_tag, "count", total)
+    return xml[:start] + open_tag + content + "".join(new_items) + f"</{tag}>" + xml[end:]
+
+
+class _StyleBook:
+    """Deriva, para cada estilo original (s=), un estilo 'marcado': relleno + fuente en negrita subrayada."""
+
+    def __init__(self, styles_xml: str, fill_rgb: str):
+        self.xml = styles_xml
+        self.fonts = _items(_block(styles_xml, "fonts")[3], "font")
+        self.n_fills = len(_items(_block(styles_xml, "fills")[3], "fill"))
+        self.xfs = _items(_block(styles_xml, "cellXfs")[3], "xf")
+        self.fill_rgb = fill_rgb
+        self.new_fonts, self.new_xfs = [], []
+        self.cache = {}
+
+    def marked(self, s: int) -> int:
+        if s in self.cache:
+            return self.cache[s]
+        if s >= len(self.xfs):
+            raise UnsupportedPackage(f"Estilo s={s} fuera de rango")
+        xf = self.xfs[s]
+        m = re.search(r'\bfontId="(\d+)"', xf)
+        font = self.fonts[int(m.group(1))] if m and int(m.group(1)) < len(self.fonts) else ""
+
+        # Misma fuente que usa mark_and_append con openpyxl: nombre y tamaño originales, negrita, subrayado
+        sz   = re.search(r'<sz val="([^"]*)"', font)
+        name = re.search(r'<name val="([^"]*)"', font)
+        new_font = "<font><b/><u/>"
+        new_font += f'<sz val="{sz.group(1)}"/>' if sz else ""
+        new_font += f'<name val="{name.group(1)}"/>' if name else ""
+        new_font += "</font>"
+        font_id = len(self.fonts) + len(self.new_fonts)
+        self.new_fonts.append(new_font)
+
+        new_xf = xf
+        for attr, val in (("fontId", font_id), ("fillId", self.n_fills), ("applyFont", 1), ("applyFill", 1)):
+            new_xf = _set_attr(new_xf, attr, val)
+        new_s = len(self.xfs) + len(self.new_xfs)
+        self.new_xfs.append(new_xf)
+        self.cache[s] = new_s
+        return new_s
+
+    def render(self) -> str:
+        if not self.new_xfs:
+            return self.xml
+        fill = (
+            f'<fill><patternFill patternType="solid"><fgColor rgb="{self.fill_rgb}"/>'
+            f'<bgColor rgb="{self.fill_rgb}"/></patternFill></fill>'
+        )
+        xml = _append(self.xml, "fonts", "font", self.new_fonts)
+        xml = _append(xml, "fills", "fill", [fill])
+        return _append(xml, "cellXfs", "xf", self.new_xfs)
+
+
+def _sheet_part(zf: ZipFile, sheet_name: str) -> str:
+    """Nombre interno (p. ej. 'xl/worksheets/sheet1.xml') de la hoja `sheet_name`."""
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    rid = None
+    for sh in wb.iter(f"{{{NS_MAIN}}}sheet"):
+        if sh.get("name") == sheet_name:
+            rid = sh.get(f"{{{NS_REL}}}id")
+    if rid is None:
+        raise ValueError(f"No existe la hoja '{sheet_name}'")
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{{{NS_PKG}}}Relationship"):
+        if rel.get("Id") == rid:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise UnsupportedPackage(f"Relación {rid} de la hoja '{sheet_name}' no encontrada")
+
+
+def _restyle_row(content: str, row: int, cols: set, styles: _StyleBook) -> str:
+    """Aplica el estilo marcado a las columnas `cols` de una fila; crea las celdas que no existan."""
+    # r= es opcional en OOXML (la celda toma la columna siguiente a la anterior); sin él no sabemos
+    # qué celda es cuál y una marca terminaría duplicando una celda existente
+    if any(not _REF_RE.search(m.group(1)) for m in _CELL_RE.finditer(content)):
+        raise UnsupportedPackage(f"Fila {row} con celdas sin referencia r=")
+    pending = set(cols)
+
+    def restyle(m):
+        attrs = m.group(1)
+        ref = _REF_RE.search(attrs)
+        if not ref or ref.group(1) not in pending:
+            return m.group(0)
+        pending.discard(ref.group(1))
+        s = _S_RE.search(attrs)
+        new_s = styles.marked(int(s.group(1)) if s else 0)
+        if s:
+            attrs = attrs[: s.start(1)] + str(new_s) + attrs[s.end(1):]
+        else:
+            attrs = attrs[: ref.end()] + f' s="{new_s}"' + attrs[ref.end():]
+        return f"<c{attrs}{m.group(2)}>"
+
+    content = _CELL_RE.sub(restyle, content)
+
+    # Celdas vacías que no estaban en el XML: se insertan respetando el orden de columnas
+    for col in sorted(pending, key=column_index_from_string):
+        idx = column_index_from_string(col)
+        new_cell = f'<c r="{col}{row}" s="{styles.marked(0)}"/>'
+        pos = len(content)
+        for c in re.finditer(r'<c\b[^>]*?\br="([A-Z]+)\d+"', content):
+            if column_index_from_string(c.group(1)) > idx:
+                pos = c.start()
+                break
+        content = content[:pos] + new_cell + content[pos:]
+    return content
+
+
+def mark_cells(
+    src_path: str,
+    out_path: str,
+    sheet_name: str,
+    cells,
+    fill_rgb: str = "00FFF59D",
+    compression="default",
+    atomic: bool = True,
+):
+    """
+    Copia `src_path` a `out_path` marcando las celdas (fila, columna) 1-based de `sheet_name`.
+    Devuelve la ruta escrita.
+    """
+    targets = {(get_column_letter(c), int(r)) for (r, c) in cells}
+    try:
+        zf = ZipFile(src_path)
+    except BadZipFile as e:
+        raise UnsupportedPackage(str(e))
+    with zf:
+        part = _sheet_part(zf, sheet_name)
+        sheet_xml = zf.read(part).decode("utf-8")
+        styles_xml = zf.read("xl/styles.xml").decode("utf-8") if "xl/styles.xml" in zf.namelist() else None
+    if styles_xml is None or "<sheetData" not in sheet_xml:
+        raise UnsupportedPackage("Paquete sin styles.xml o con prefijos de namespace")
+
+    styles = _StyleBook(styles_xml, fill_rgb)
+    by_row = {}
+    for (col, row) in targets:
+        by_row.setdefault(row, set()).add(col)
+
+    # Solo se entra en las filas con marcas; el resto del XML no se toca
+    def fix_row(m):
+        attrs = m.group(1)
+        r = re.search(r'\br="(\d+)"', attrs)
+        if not r or int(r.group(1)) not in by_row:
+            return m.group(0)
+        row = int(r.group(1))
+        content = _restyle_row(m.group(2) or "", row, by_row.pop(row), styles)
+        return f"<row{attrs}>{content}</row>"
+
+    if targets:
+        sheet_xml = _ROW_RE.sub(fix_row, sheet_xml)
+        if by_row:
+            raise UnsupportedPackage(f"Filas inexistentes en la hoja: {sorted(by_row)[:5]}")
+
+    replace = {}
+    if targets:
+        replace = {part: sheet_xml.encode("utf-8"), "xl/styles.xml": styles.render().encode("utf-8")}
+    return copy_package(src_path, out_path, replace, compression=compression, atomic=atomic)
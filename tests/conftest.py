@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+from src.main import _load_config
+
+AFIP_HEADER = [
+    "Fecha", "Tipo", "Punto de Venta", "Número Desde", "Número Hasta", "Tipo Doc. Vendedor",
+    "Nro. Doc. Vendedor", "Denominación Vendedor", "Tipo Cambio", "Moneda", "Neto Gravado",
+    "No Gravado", "Exento", "IVA", "Total",
+]
+TANGO_HEADER = ["IDENTIFTRI", "N_COMP", "IMP_EXENTO", "IMP_NETO", "IMP_IVA", "IMP_TOTAL"]
+
+
+def _write_afip(path: Path, facturas):
+    """facturas: (número, neto, iva) de Factura A del CUIT 20202012375."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["Comprobantes de Compras"])
+    ws.append(AFIP_HEADER)
+    for num, neto, iva in facturas:
+        ws.append(["01/08/2025", "1 - Factura A", 2, num, None, "CUIT", 20202012375, "PAGANI", 1, "$",
+                   neto, 0, 0, iva, neto + iva])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+
+
+def _write_tango(path: Path, sheets):
+    """sheets: nombre de hoja -> filas (número, neto, iva)."""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append(TANGO_HEADER)
+        for num, neto, iva in rows:
+            ws.append(["20-20201237-5", f"A{2:05d}{num:08d}", 0, neto, iva, neto + iva])
+    wb.save(path)
+
+
+@pytest.fixture
+def write_afip():
+    return _write_afip
+
+
+@pytest.fixture
+def write_tango():
+    return _write_tango
+
+
+@pytest.fixture
+def cfg():
+    """config.yaml del repo, sin historial ni procesos extra."""
+    cfg = _load_config()
+    cfg.update(history_db=None, parallel_load=False, parallel_save=False)
+    return cfg
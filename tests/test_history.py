@@ -0,0 +1,20 @@
+import pytest
+
+from src.history import HistoryStore
+
+FILTERS = {
+    "cuit": "r.cuit = ?",
+    "n_comp": "r.n_comp = ?",
+    "periodo": "r.periodo >= ?",
+    "estado": "r.estado = ?",
+}
+
+
+@pytest.mark.parametrize("where", FILTERS.values(), ids=FILTERS.keys())
+def test_cada_filtro_usa_un_indice(tmp_path, where):
+    with HistoryStore(tmp_path / "historial.sqlite") as store:
+        plan = store.conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT r.* FROM results r WHERE {where}", ["x"]
+        ).fetchall()
+    detail = " ".join(row[-1] for row in plan)
+    assert "USING INDEX" in detail and "SCAN r" not in detail
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.money import to_scaled, to_cents, apply_rate_cents, amounts_match
+
+
+@pytest.mark.parametrize("value, cents", [
+    (0.285, 29),          # 0.285 * 100 = 28.4999... en binario
+    (-1.005, -101),       # la mitad se redondea lejos de cero
+    (1.004, 100),
+    (2.675, 268),
+    (-0.005, -1),
+    (1234.5, 123450),
+])
+def test_floats_half_away_from_zero(value, cents):
+    scaled, valid = to_scaled(pd.Series([value]))
+    assert valid.tolist() == [True]
+    assert scaled.tolist() == [cents]
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("1.234,56", 123456),
+    ("-1.234,565", -123457),
+    ("0,285", 29),
+    (" 12 ", 1200),
+    (",5", 50),
+])
+def test_texto_con_formato_local(text, cents):
+    scaled, valid = to_scaled(pd.Series([text], dtype=object))
+    assert valid.tolist() == [True]
+    assert scaled.tolist() == [cents]
+
+
+def test_vacios_e_invalidos():
+    s = pd.Series([None, np.nan, "", "abc", 10.0, "3,5"], dtype=object)
+    scaled, valid = to_scaled(s)
+    assert valid.tolist() == [False, False, False, False, True, True]
+    assert scaled[valid].tolist() == [1000, 350]
+    assert to_cents(s).isna().tolist() == [True, True, True, True, False, False]
+
+
+def test_tipo_de_cambio():
+    rate, _ = to_scaled(pd.Series([1.0, 950.5, 0.333333]), 6)
+    # 100,01 USD a 950,50 = 95.059,505 -> 95.059,51; 100,01 a 0,333333 = 33,3366... -> 33,34
+    assert apply_rate_cents(np.array([10001] * 3), rate).tolist() == [10001, 9505951, 3334]
+    assert apply_rate_cents(np.array([-10001]), rate[1:2]).tolist() == [-9505951]
+
+
+@pytest.mark.parametrize("exact", [True, False])
+def test_amounts_match(exact):
+    origen  = pd.Series([100.0, np.nan, np.nan, 100.0, 10.0, "1.000,00"], dtype=object)
+    destino = pd.Series([100.005, np.nan, 5.0, np.nan, 9505.0, 1000.0], dtype=object)
+    tc      = pd.Series([1.0, 1.0, 1.0, 1.0, 950.5, None], dtype=object)
+
+    match, shown = amounts_match(origen, tc, destino, 0.01, exact=exact)
+
+    # NaN contra NaN coincide; uno solo vacío no; TC vacío = 1
+    assert match.tolist() == [True, True, False, False, True, True]
+    assert shown.iloc[4] == pytest.approx(9505.0)
+    assert np.isnan(shown.iloc[1])
+
+
+def test_exacto_en_el_borde_de_la_tolerancia():
+    # 0,1 + 0,2 en float no es 0,3: en centavos la diferencia es exactamente 0
+    origen, destino = pd.Series([0.1 + 0.2, 10.0]), pd.Series([0.3, 10.02])
+    match, _ = amounts_match(origen, 1.0, destino, 0.0, exact=True)
+    assert match.tolist() == [True, False]
+    match, _ = amounts_match(origen, 1.0, destino, 0.02, exact=True)
+    assert match.tolist() == [True, True]
+
+    # Un centavo de diferencia con tolerancia 0,01: en float |100 - 100,01| > 0,01
+    origen, destino = pd.Series([100.0]), pd.Series([100.01])
+    assert amounts_match(origen, 1.0, destino, 0.01, exact=True)[0].tolist() == [True]
+    assert amounts_match(origen, 1.0, destino, 0.01, exact=False)[0].tolist() == [False]
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+from src.main import main
+from src.preflight import PreflightError, run_preflight
+
+REPO = Path(__file__).resolve().parents[1]
+
+
+def _preflight(cfg, origen, destino, origen_sheet="Sheet1", destino_sheet="Hoja1"):
+    run_preflight(str(origen), str(destino), origen_sheet, destino_sheet, cfg["mapping"], cfg["columns"])
+
+
+def test_archivos_validos(tmp_path, write_afip, write_tango, cfg):
+    write_afip(tmp_path / "afip.xlsx", [(10, 1000.0, 210.0)])
+    write_tango(tmp_path / "tango.xlsx", {"Hoja1": [(10, 1000.0, 210.0)]})
+    _preflight(cfg, tmp_path / "afip.xlsx", tmp_path / "tango.xlsx")
+
+
+def test_junta_todos_los_problemas(tmp_path, write_tango, cfg):
+    # AFIP con solo 5 columnas: las letras del mapeo (G, I, K...) quedan fuera de rango
+    wb = Workbook()
+    wb.active.title = "Sheet1"
+    wb.active.append(["Comprobantes de Compras"])
+    wb.active.append(["Fecha", "Tipo", "Punto de Venta", "Número Desde", "Número Hasta"])
+    wb.save(tmp_path / "afip.xlsx")
+    write_tango(tmp_path / "tango.xlsx", {"Otra": []})
+
+    with pytest.raises(PreflightError) as info:
+        _preflight(cfg, tmp_path / "afip.xlsx", tmp_path / "tango.xlsx")
+
+    problems = info.value.problems
+    assert any("AFIP: la columna 'G' (cuit) está fuera de rango" in p for p in problems)
+    assert any("Tango: no existe la hoja 'Hoja1'" in p and "['Otra']" in p for p in problems)
+
+
+def test_archivo_inexistente_y_tipo_desconocido(tmp_path, write_afip, cfg):
+    write_afip(tmp_path / "afip.xlsx", [])
+    cfg["columns"] = cfg["columns"] + [{"name": "IMP_TOTAL", "type": "moneda"}]
+
+    with pytest.raises(PreflightError) as info:
+        _preflight(cfg, tmp_path / "afip.xlsx", tmp_path / "falta.xlsx")
+
+    assert info.value.problems == [
+        "config.yaml: tipo 'moneda' desconocido en la columna 'IMP_TOTAL'; opciones: ('number', 'date', 'string', 'cuit').",
+        f"Tango: no existe el archivo '{tmp_path / 'falta.xlsx'}'.",
+    ]
+
+
+def test_cli_informa_sin_traceback(tmp_path, capsys):
+    assert main(["--origen", str(tmp_path / "a.xlsx"), "--destino", str(tmp_path / "t.xlsx")]) == 2
+    err = capsys.readouterr().err
+    assert "no existe el archivo" in err and "Traceback" not in err
+
+
+def test_python_m_src_main_sale_con_error(tmp_path):
+    env = dict(os.environ, PYTHONPATH=str(REPO))
+    proc = subprocess.run(
+        [sys.executable, "-m", "src.main", "--origen", str(tmp_path / "a.xlsx"), "--destino", str(tmp_path / "t.xlsx")],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 2
+    assert "AFIP: no existe el archivo" in proc.stderr
+    assert "Traceback" not in proc.stderr
@@ -0,0 +1,36 @@
+import pandas as pd
+from openpyxl import load_workbook
+
+from src.report import write_report
+
+
+def _cells(path) -> dict:
+    ws = load_workbook(path).active
+    return {
+        c.coordinate: (c.value, c.font.b, c.border.left.style, c.border.bottom.style,
+                       c.alignment.horizontal, c.alignment.vertical, c.number_format)
+        for row in ws.iter_rows() for c in row
+    }
+
+
+def test_mismo_formato_que_pandas_y_diferencias_en_amarillo(tmp_path):
+    df = pd.DataFrame({
+        "N_COMP": ["A0000200000010", "A0000200000011"],
+        "IMP_TOTAL_origen": [1210.0, 605.0],
+        "IMP_TOTAL_destino": [1210.0, None],
+        "__match__IMP_TOTAL": [True, False],
+        "FECHA_origen": pd.to_datetime(["2025-08-01", "2025-08-02"]),
+        "FECHA_destino": pd.to_datetime(["2025-08-01", None]),
+        "__match__FECHA": [True, False],
+    })
+    df["__row_ok__"] = df["__match__IMP_TOTAL"] & df["__match__FECHA"]
+    columns_cfg = [{"name": "IMP_TOTAL"}, {"name": "FECHA"}]
+    cols = ["N_COMP", "IMP_TOTAL_origen", "IMP_TOTAL_destino", "FECHA_origen", "FECHA_destino", "__row_ok__"]
+
+    write_report(str(tmp_path / "reporte.xlsx"), df, ["N_COMP"], columns_cfg)
+    df[cols].to_excel(tmp_path / "pandas.xlsx", sheet_name="Validación", index=False)
+
+    assert _cells(tmp_path / "reporte.xlsx") == _cells(tmp_path / "pandas.xlsx")
+    ws = load_workbook(tmp_path / "reporte.xlsx")["Validación"]
+    filled = [c.coordinate for row in ws.iter_rows() for c in row if c.fill.fill_type == "solid"]
+    assert filled == ["B3", "C3", "D3", "E3"]
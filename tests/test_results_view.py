@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.compare import AMOUNT_COLS, STATUS_OK, STATUS_DIFF, STATUS_MISSING
+from src.results_view import ResultsModel, ORDER_DIFF, ORDER_NATURAL
+
+
+def _comparison():
+    """Cuatro facturas: una coincide, dos con diferencias y una omitida."""
+    rows = [
+        # N_COMP, CUIT, estado, total origen, total destino
+        ("A0000200000010", "20202012375", STATUS_OK, 1210.0, 1210.0),
+        ("A0000200000011", "20202012375", STATUS_DIFF, 605.0, 600.0),
+        ("C0000300000001", "30712345678", STATUS_DIFF, 100.0, 250.0),
+        ("B0000100000007", "30712345678", STATUS_MISSING, 80.0, np.nan),
+    ]
+    df = pd.DataFrame(rows, columns=["N_COMP", "IDENTIFTRI", "ESTADO", "IMP_TOTAL_origen", "IMP_TOTAL_destino"])
+    df["FECHA"] = pd.to_datetime(["2025-08-01", "2025-08-02", None, "2025-08-04"])
+    df["__match__IMP_TOTAL"] = df["ESTADO"] == STATUS_OK
+    for name in AMOUNT_COLS:
+        if name != "IMP_TOTAL":
+            df[f"{name}_origen"] = df[f"{name}_destino"] = 0.0
+            df[f"__match__{name}"] = True
+    return df
+
+
+@pytest.fixture
+def model():
+    return ResultsModel(_comparison(), messages=["m0", "m1", "m2", "m3"])
+
+
+def test_conteos_y_diferencias(model):
+    assert len(model) == 4
+    assert model.counts() == {STATUS_OK: 1, STATUS_DIFF: 2, STATUS_MISSING: 1}
+    # Omitida: cuenta el importe de origen completo
+    assert model.diff.tolist() == [0.0, 5.0, 150.0, 80.0]
+
+
+@pytest.mark.parametrize("filters, rows", [
+    ({}, [0, 1, 2, 3]),
+    ({"estado": STATUS_DIFF}, [1, 2]),
+    ({"estado": "Todos"}, [0, 1, 2, 3]),         # valor que no es un estado: sin filtro
+    ({"cuit": "30-71234"}, [2, 3]),               # los guiones se ignoran
+    ({"cuit": "2375"}, [0, 1]),
+    ({"cuit": "99999"}, []),
+    ({"letra": "C"}, [2]),
+    ({"letra": "Z"}, [0, 1, 2, 3]),
+    ({"estado": STATUS_DIFF, "cuit": "20202012375"}, [1]),
+])
+def test_filtros(model, filters, rows):
+    assert model.view(**filters).tolist() == rows
+
+
+def test_orden_por_diferencia(model):
+    assert model.view(order=ORDER_DIFF).tolist() == [2, 3, 1, 0]
+    assert model.view(order=ORDER_DIFF, cuit="30712345678").tolist() == [2, 3]
+    assert model.view(order=ORDER_NATURAL, estado=STATUS_DIFF).tolist() == [1, 2]
+
+
+def test_orden_estable_con_empates():
+    df = _comparison()
+    df["IMP_TOTAL_destino"] = df["IMP_TOTAL_origen"] - 5.0
+    df["__match__IMP_TOTAL"] = False
+    assert ResultsModel(df).view(order=ORDER_DIFF).tolist() == [0, 1, 2, 3]
+
+
+def test_paginado_formatea_solo_las_filas_pedidas(model):
+    view = model.view(order=ORDER_DIFF)
+    page = [model.row(i) for i in view[:2]]
+    assert page == [
+        ("C0000300000001", "30-71234567-8", "", STATUS_DIFF, "100,00", "250,00", "150,00"),
+        ("B0000100000007", "30-71234567-8", "2025-08-04", STATUS_MISSING, "80,00", "", "80,00"),
+    ]
+    assert model.row(0)[-1] == ""
+    assert [model.message(i) for i in view[2:]] == ["m1", "m0"]
+    assert ResultsModel(_comparison()).message(0) == ""
+
+
+def test_resultado_vacio():
+    model = ResultsModel(_comparison().iloc[0:0])
+    assert len(model) == 0
+    assert model.view(order=ORDER_DIFF, cuit="20").tolist() == []
+    assert model.counts() == {STATUS_OK: 0, STATUS_DIFF: 0, STATUS_MISSING: 0}
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from src.main import run_validation
+from src.sources import part_labels
+
+
+def _filled(path: Path) -> dict:
+    """hoja -> celdas con relleno, para ver qué marcó cada salida."""
+    wb = load_workbook(path)
+    return {ws.title: sorted(c.coordinate for row in ws.iter_rows() for c in row if c.fill.fill_type == "solid")
+            for ws in wb.worksheets}
+
+
+def test_factura_repartida_en_dos_hojas_de_tango(tmp_path, write_afip, write_tango, cfg):
+    write_afip(tmp_path / "afip.xlsx", [(10, 1000.0, 210.0), (11, 500.0, 105.0)])
+    # La factura 10 está partida entre las dos hojas; la 11 solo en Hoja2, con el IVA mal cargado
+    write_tango(tmp_path / "tango.xlsx", {
+        "Hoja1": [(10, 600.0, 126.0)],
+        "Hoja2": [(10, 400.0, 84.0), (11, 500.0, 100.0)],
+    })
+
+    result = run_validation(
+        str(tmp_path / "afip.xlsx"), str(tmp_path / "tango.xlsx"),
+        destino_sheet=["Hoja1", "Hoja2"], output_dir=str(tmp_path / "out"), cfg=cfg,
+    )
+
+    comparison = result["comparacion"].set_index("N_COMP")
+    assert comparison["ESTADO"].tolist() == ["Coincide", "No coincide"]
+    assert comparison.loc["A0000200000010", "IMP_TOTAL_destino"] == 1210.0
+    assert comparison.loc["A0000200000010", "HOJA_destino"] == "Hoja1"
+    assert comparison.loc["A0000200000011", "FILA_destino"] == 3
+    assert result["faltantes"] == 0
+    assert len(result["destinos_validados"]) == 1
+
+    # Las marcas siguen al ESTADO: la factura partida no se marca en ninguna hoja,
+    # la 11 solo en IVA y TOTAL de su fila
+    assert _filled(Path(result["destino_validado"])) == {"Hoja1": [], "Hoja2": ["E3", "F3"]}
+    origen = load_workbook(result["origen_validado"])["Origen"]
+    assert [origen.cell(row=r, column=1).fill.fgColor.rgb for r in (2, 3)] == ["00C8E6C9", "00FFCDD2"]
+
+
+def test_marcas_en_modo_full_iguales_a_targeted(tmp_path, write_afip, write_tango, cfg):
+    write_afip(tmp_path / "afip.xlsx", [(10, 1000.0, 210.0), (11, 500.0, 105.0)])
+    write_tango(tmp_path / "tango.xlsx", {"Hoja1": [(10, 1000.0, 200.0), (11, 500.0, 105.0)]})
+
+    filled = []
+    for mode in ("targeted", "full"):
+        result = run_validation(
+            str(tmp_path / "afip.xlsx"), str(tmp_path / "tango.xlsx"),
+            output_dir=str(tmp_path / mode), cfg=dict(cfg, mark_mode=mode),
+        )
+        filled.append(_filled(Path(result["destino_validado"])))
+    assert filled[0] == filled[1] == {"Hoja1": ["E2", "F2"]}
+
+
+def test_part_labels_no_se_repiten():
+    parts = [
+        ("data/2025-07/Mis Comprobantes.xlsx", "Sheet1"),
+        ("data/2025-08/Mis Comprobantes.xlsx", "Sheet1"),
+        ("otra/2025-08/Mis Comprobantes.xlsx", "Sheet1"),
+        ("tango.xlsx", "Hoja1"),
+        ("tango.xlsx", "Hoja2"),
+    ]
+    labels = part_labels(parts)
+    assert len(set(labels)) == len(labels)
+    assert labels[0] == "_2025-07_Mis_Comprobantes"
+    assert labels[3:] == ["_tango_Hoja1", "_tango_Hoja2"]
+    assert part_labels(parts[:1]) == [""]
+
+
+def test_mismo_nombre_en_distintas_carpetas(tmp_path, write_afip, write_tango, cfg):
+    write_afip(tmp_path / "2025-07" / "Mis Comprobantes.xlsx", [(10, 1000.0, 210.0)])
+    write_afip(tmp_path / "2025-08" / "Mis Comprobantes.xlsx", [(11, 500.0, 105.0)])
+    write_tango(tmp_path / "tango.xlsx", {"Hoja1": [(10, 1000.0, 210.0), (11, 500.0, 105.0)]})
+
+    result = run_validation(
+        str(tmp_path / "*" / "Mis Comprobantes.xlsx"), str(tmp_path / "tango.xlsx"),
+        output_dir=str(tmp_path / "out"), cfg=cfg,
+    )
+
+    outputs = result["origenes_validados"]
+    assert len(outputs) == 2 and len(set(outputs)) == 2
+    assert all(Path(p).exists() for p in outputs)
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import Workbook
+
+from src.main import _load_config
+from src.transform import load_afip_with_map
+
+
+def test_fecha_afip_en_texto_iso_dd_mm_y_celda_de_fecha(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Comprobantes de Compras"])
+    ws.append(["Fecha", "Tipo", "Punto de Venta", "Número Desde"] + [f"Col{j}" for j in range(5, 16)])
+    for num, fecha in enumerate(["2025-08-01", "01/08/2025", datetime(2025, 8, 1), "sin fecha"], start=1):
+        ws.append([fecha, "1 - Factura A", 2, num] + [None] * 11)
+    wb.save(tmp_path / "afip.xlsx")
+
+    df = load_afip_with_map(str(tmp_path / "afip.xlsx"), ws.title, _load_config()["mapping"])
+
+    # "2025-08-01" es 1 de agosto, no 8 de enero (dayfirst no aplica a ISO)
+    assert df["FECHA"].tolist()[:3] == [pd.Timestamp(2025, 8, 1)] * 3
+    assert pd.isna(df["FECHA"].iloc[3])
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from src.watcher import InboxWatcher, FAILED_DIR, PROCESSED_DIR
+
+
+@pytest.fixture
+def watcher(tmp_path, cfg):
+    w = InboxWatcher(tmp_path / "entrada", tmp_path / "salida", cfg=cfg, settle_seconds=0)
+    yield w
+    w.close()
+
+
+def _run(watcher) -> list:
+    """Dos pasadas (la primera solo registra tamaño y fecha) y espera los trabajos."""
+    watcher.poll_once()
+    watcher.poll_once()
+    return watcher.drain(timeout=60)
+
+
+def _drop_pair(inbox, name, write_afip, write_tango):
+    write_afip(inbox / f"{name}_afip.xlsx", [(10, 1000.0, 210.0), (11, 500.0, 105.0)])
+    write_tango(inbox / f"{name}_tango.xlsx", {"Hoja1": [(10, 1000.0, 210.0)]})
+
+
+def test_par_por_nombre(watcher, write_afip, write_tango):
+    _drop_pair(watcher.inbox, "agosto", write_afip, write_tango)
+
+    [summary] = _run(watcher)
+
+    assert summary["estado"] == "ok"
+    assert (summary["coinciden"], summary["faltantes"]) == (1, 1)
+    [job_dir] = watcher.outbox.iterdir()
+    assert job_dir.name == f"agosto_{summary['corrida']}"
+    assert json.loads((job_dir / "summary.json").read_text(encoding="utf-8"))["estado"] == "ok"
+    assert sorted(p.name for p in (watcher.inbox / PROCESSED_DIR).iterdir()) == ["agosto_afip.xlsx", "agosto_tango.xlsx"]
+    assert not list(watcher.inbox.glob("*.xlsx"))
+
+
+def test_mismo_trabajo_dos_veces_no_pisa_nada(watcher, write_afip, write_tango):
+    _drop_pair(watcher.inbox, "agosto", write_afip, write_tango)
+    first = _run(watcher)
+    _drop_pair(watcher.inbox, "agosto", write_afip, write_tango)
+    second = _run(watcher)
+
+    assert [s["estado"] for s in first + second] == ["ok", "ok"]
+    # Una carpeta de salida por corrida y los cuatro archivos de entrada archivados
+    assert len(list(watcher.outbox.iterdir())) == 2
+    archived = sorted(p.name for p in (watcher.inbox / PROCESSED_DIR).iterdir())
+    assert len(archived) == 4
+    assert archived[0] == "agosto_afip.xlsx" and archived[2] == "agosto_tango.xlsx"
+
+
+def test_manifiesto_con_listas(watcher, write_afip, write_tango):
+    write_afip(watcher.inbox / "julio.xlsx", [(10, 1000.0, 210.0)])
+    write_afip(watcher.inbox / "agosto.xlsx", [(11, 500.0, 105.0)])
+    write_tango(watcher.inbox / "tango.xlsx", {"Hoja1": [(10, 1000.0, 210.0), (11, 500.0, 105.0)]})
+    (watcher.inbox / "bimestre.json").write_text(
+        json.dumps({"origen": ["julio.xlsx", "agosto.xlsx"], "destino": "tango.xlsx"}), encoding="utf-8"
+    )
+
+    [summary] = _run(watcher)
+
+    assert summary["estado"] == "ok"
+    assert summary["coinciden"] == 2
+    assert len(summary["origenes_validados"]) == 2
+    assert not list(watcher.inbox.glob("*.*"))
+
+
+def test_manifiesto_invalido_va_a_errores(watcher, capsys):
+    (watcher.inbox / "roto.json").write_text(json.dumps({"origen": 3, "destino": "x.xlsx"}), encoding="utf-8")
+    (watcher.inbox / "trunco.json").write_text('{"origen": "a.xlsx", ', encoding="utf-8")
+
+    assert _run(watcher) == []
+
+    assert sorted(p.name for p in (watcher.inbox / FAILED_DIR).iterdir()) == ["roto.json", "trunco.json"]
+    assert "Manifiesto inválido roto.json" in capsys.readouterr().out
@@ -0,0 +1,95 @@
+import re
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+from src.mark_dest import YELLOW, _apply_marks_openpyxl, mark_and_append
+from src.xlsx_io import save_workbook
+from src.xlsx_patch import UnsupportedPackage, mark_cells
+
+HEADER = ["IDENTIFTRI", "N_COMP", "IMP_EXENTO", "IMP_NETO", "IMP_IVA", "IMP_TOTAL"]
+
+
+def _tango(path: Path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Hoja1"
+    ws.append(HEADER)
+    ws.append(["20-20201237-5", "A0000200000010", 0, 1000.0, 210.0, 1210.0])
+    ws.append(["20-20201237-5", "A0000200000011", None, 500.0, 105.0, 605.0])
+    ws["D2"].font = Font(name="Arial", size=9, italic=True)
+    ws["D2"].number_format = "#,##0.00"
+    ws["Z9"] = "lejos"   # fila con una sola celda, fuera de las marcadas
+    wb.create_sheet("Otra")["A1"] = "sin tocar"
+    wb.save(path)
+
+
+def _strip_refs(path: Path, row: int):
+    """Reescribe la hoja sin el atributo r= en las celdas de `row` (válido en OOXML)."""
+    with zipfile.ZipFile(path) as zf:
+        parts = {name: zf.read(name) for name in zf.namelist()}
+    xml = parts["xl/worksheets/sheet1.xml"].decode("utf-8")
+    xml = re.sub(rf'(<c\b[^>]*?) r="[A-Z]+{row}"', r"\1", xml)
+    parts["xl/worksheets/sheet1.xml"] = xml.encode("utf-8")
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+
+
+def _cells(path: Path) -> dict:
+    """coordenada -> (valor, relleno, negrita, subrayado, fuente, tamaño, formato) de todas las hojas."""
+    wb = load_workbook(path)
+    out = {}
+    for ws in wb.worksheets:
+        for row in ws.iter_rows():
+            for c in row:
+                fill = c.fill.fgColor.rgb if c.fill.fill_type == "solid" else None
+                out[(ws.title, c.coordinate)] = (
+                    c.value, fill, bool(c.font.b), c.font.u, c.font.name, c.font.sz, c.number_format,
+                )
+    return out
+
+
+def test_targeted_igual_que_full(tmp_path):
+    _tango(tmp_path / "tango.xlsx")
+    # D2 con fuente propia, C3 vacía (no está en el XML), F3 con el estilo por defecto
+    marks = [(2, 4), (3, 3), (3, 6)]
+
+    mark_cells(tmp_path / "tango.xlsx", tmp_path / "targeted.xlsx", "Hoja1", marks, fill_rgb=YELLOW.start_color.rgb)
+    wb = load_workbook(tmp_path / "tango.xlsx")
+    _apply_marks_openpyxl(wb["Hoja1"], marks)
+    save_workbook(wb, tmp_path / "full.xlsx")
+
+    targeted, full = _cells(tmp_path / "targeted.xlsx"), _cells(tmp_path / "full.xlsx")
+    assert targeted == full
+    assert targeted[("Hoja1", "D2")] == (1000.0, "00FFF59D", True, "single", "Arial", 9, "#,##0.00")
+    assert targeted[("Hoja1", "C3")][:3] == (None, "00FFF59D", True)
+    assert targeted[("Hoja1", "E2")][1] is None
+    assert targeted[("Otra", "A1")][0] == "sin tocar"
+
+
+def test_celdas_sin_referencia_vuelven_a_openpyxl(tmp_path):
+    _tango(tmp_path / "tango.xlsx")
+    _strip_refs(tmp_path / "tango.xlsx", 2)
+    assert load_workbook(tmp_path / "tango.xlsx")["Hoja1"]["D2"].value == 1000.0
+
+    with pytest.raises(UnsupportedPackage):
+        mark_cells(tmp_path / "tango.xlsx", tmp_path / "out.xlsx", "Hoja1", [(2, 5)])
+
+    # mark_and_append cae a openpyxl: la marca queda en E2 sin pisar ningún valor de la fila
+    comparison = pd.DataFrame({
+        "N_COMP": ["A0000200000010"], "IDENTIFTRI": ["20202012375"], "FILA_destino": [2],
+        "__match__IMP_IVA": [False],
+    })
+    columns_cfg = [{"name": "IMP_IVA", "type": "number"}]
+    written, missing = mark_and_append(
+        comparison, str(tmp_path / "tango.xlsx"), "Hoja1", columns_cfg, str(tmp_path / "out.xlsx"),
+    )
+    ws = load_workbook(written)["Hoja1"]
+    assert missing == 0
+    assert [c.value for c in ws[2]][:6] == ["20-20201237-5", "A0000200000010", 0, 1000.0, 210.0, 1210.0]
+    assert ws["E2"].fill.fgColor.rgb == "00FFF59D"